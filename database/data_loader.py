@@ -1,8 +1,8 @@
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional, Tuple
 
 import mysql.connector
-import numpy as np
 import pandas as pd
 from mysql.connector import Error
 from sqlalchemy import create_engine
@@ -11,6 +11,27 @@ from .db_config import DatabaseConfig
 
 logger = logging.getLogger(__name__)
 
+# Le moteur pyarrow parse le CSV en C++ multithreadé ; repli sur le moteur C sinon
+try:
+    import pyarrow  # noqa: F401
+
+    _CSV_ENGINE = "pyarrow"
+except ImportError:
+    _CSV_ENGINE = "c"
+
+# Colonnes du CSV source utilisées et leur nom en base
+_COLUMN_MAPPING = {
+    "Code.département": "code_departement",
+    "Code.région": "code_region",
+    "classe": "type_crime",
+    "annee": "annee",
+    "unité.de.compte": "unite_compte",
+    "faits": "nombre_faits",
+    "POP": "population",
+    "LOG": "logements",
+    "tauxpourmille": "taux_pour_mille",
+}
+
 
 class DataLoader:
     def __init__(self):
@@ -22,21 +43,8 @@ class DataLoader:
     def _clean_data(self, df: pd.DataFrame) -> pd.DataFrame:
         """Nettoie et prépare les données avec Pandas"""
         try:
-            # Mapping des colonnes
-            column_mapping = {
-                "Code.département": "code_departement",
-                "Code.région": "code_region",
-                "classe": "type_crime",
-                "annee": "annee",
-                "unité.de.compte": "unite_compte",
-                "faits": "nombre_faits",
-                "POP": "population",
-                "LOG": "logements",
-                "tauxpourmille": "taux_pour_mille",
-            }
-
             # Renommage des colonnes
-            df = df.rename(columns=column_mapping)
+            df = df.rename(columns=_COLUMN_MAPPING)
 
             # Nettoyage des strings
             string_columns = [
@@ -88,25 +96,19 @@ class DataLoader:
             return df
 
         except Exception as e:
-            logger.error(f"Erreur lors du nettoyage des données: {e}")
+            logger.error("Erreur lors du nettoyage des données: %s", e)
             raise
 
-    def _convert_numpy_to_python(self, value):
-        """Convertit les types numpy en types Python natifs"""
-        if isinstance(value, (np.int64, np.int32)):
-            return int(value)
-        elif isinstance(value, (np.float64, np.float32)):
-            return float(value)
-        return value
-
     def _prepare_dataframes(
         self, df: pd.DataFrame
     ) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
         """Prépare les DataFrames pour chaque table"""
-        # Préparation crimes
+        # Préparation crimes : une ligne par clé (type_crime, annee). Les faits
+        # du CSV sont départementaux ; le premier relevé est conservé, comme
+        # avec l'INSERT IGNORE d'origine, pour que l'upsert ne le remplace pas
         crimes_df = df[
             ["type_crime", "unite_compte", "annee", "nombre_faits"]
-        ].drop_duplicates()
+        ].drop_duplicates(subset=["type_crime", "annee"], keep="first")
 
         # Préparation départements (prendre la dernière valeur pour population et logements)
         departements_df = (
@@ -125,33 +127,28 @@ class DataLoader:
         try:
             if table_name == "crimes":
                 query = """
-                INSERT IGNORE INTO crimes 
+                INSERT INTO crimes 
                 (type_crime, unite_compte, annee, nombre_faits) 
                 VALUES (%s, %s, %s, %s)
+                ON DUPLICATE KEY UPDATE nombre_faits = VALUES(nombre_faits)
                 """
-                values = list(
-                    zip(
-                        df["type_crime"],
-                        df["unite_compte"],
-                        df["annee"],
-                        df["nombre_faits"],
-                    )
-                )
+                columns = ["type_crime", "unite_compte", "annee", "nombre_faits"]
 
             elif table_name == "departements":
                 query = """
-                INSERT IGNORE INTO departements 
+                INSERT INTO departements 
                 (code_departement, code_region, population, logements) 
                 VALUES (%s, %s, %s, %s)
+                ON DUPLICATE KEY UPDATE
+                    population = VALUES(population),
+                    logements = VALUES(logements)
                 """
-                values = list(
-                    zip(
-                        df["code_departement"],
-                        df["code_region"],
-                        df["population"],
-                        df["logements"],
-                    )
-                )
+                columns = [
+                    "code_departement",
+                    "code_region",
+                    "population",
+                    "logements",
+                ]
 
             elif table_name == "statistiques":
                 query = """
@@ -160,21 +157,17 @@ class DataLoader:
                 SELECT c.id_crime, %s, %s
                 FROM crimes c
                 WHERE c.type_crime = %s AND c.annee = %s
+                ON DUPLICATE KEY UPDATE taux_pour_mille = VALUES(taux_pour_mille)
                 """
-                values = list(
-                    zip(
-                        df["code_departement"],
-                        df["taux_pour_mille"],
-                        df["type_crime"],
-                        df["annee"],
-                    )
-                )
+                columns = [
+                    "code_departement",
+                    "taux_pour_mille",
+                    "type_crime",
+                    "annee",
+                ]
 
-            # Convertir les types numpy
-            values = [
-                tuple(self._convert_numpy_to_python(value) for value in row)
-                for row in values
-            ]
+            # Conversion colonne par colonne : tolist() produit des types Python natifs
+            values = df[columns].to_numpy().tolist()
 
             # Insertion par lots
             batch_size = self.config.get_batch_size()
@@ -183,48 +176,168 @@ class DataLoader:
                 cursor.executemany(query, batch)
 
         except Error as e:
-            logger.error(f"Erreur lors de l'insertion dans {table_name}: {e}")
+            logger.error("Erreur lors de l'insertion dans %s: %s", table_name, e)
             raise
 
-    def load_data(self, source: str = "csv", file_path: Optional[str] = None) -> None:
+    def _load_table(
+        self, table_name: str, df: pd.DataFrame, bulk_load: bool = False
+    ) -> None:
+        """Insère un DataFrame dans une table via une connexion dédiée"""
+        conn = mysql.connector.connect(**self.config.get_connection_params())
+        cursor = conn.cursor()
+
+        try:
+            if bulk_load:
+                # Les clés étrangères sont garanties par l'ordre de chargement.
+                # unique_checks reste actif : les upserts en dépendent.
+                cursor.execute("SET SESSION foreign_key_checks = 0")
+
+            logger.info("Insertion des %s...", table_name)
+            self._insert_data_to_mysql(table_name, df, cursor)
+            conn.commit()
+
+        finally:
+            # Les variables de session disparaissent avec la connexion
+            cursor.close()
+            conn.close()
+
+    def refresh_rollups(self) -> None:
+        """Recalcule les tables d'agrégats dérivées des statistiques"""
+        conn = mysql.connector.connect(**self.config.get_connection_params())
+        cursor = conn.cursor()
+
+        try:
+            logger.info("Rafraîchissement de stats_regionales...")
+            cursor.execute("DELETE FROM stats_regionales")
+            cursor.execute(
+                """
+                INSERT INTO stats_regionales
+                (code_region, type_crime, annee, taux_moyen, taux_min, taux_max,
+                 ecart_type)
+                SELECT
+                    d.code_region,
+                    c.type_crime,
+                    c.annee,
+                    AVG(s.taux_pour_mille),
+                    MIN(s.taux_pour_mille),
+                    MAX(s.taux_pour_mille),
+                    STDDEV(s.taux_pour_mille)
+                FROM crimes c
+                JOIN statistiques s ON c.id_crime = s.id_crime
+                JOIN departements d ON s.code_departement = d.code_departement
+                GROUP BY d.code_region, c.type_crime, c.annee
+                """
+            )
+
+            logger.info("Rafraîchissement de stats_departementales...")
+            cursor.execute("DELETE FROM stats_departementales")
+            cursor.execute(
+                """
+                INSERT INTO stats_departementales
+                (code_departement, annee, type_crime, nombre_faits, taux_pour_mille,
+                 population, logements)
+                SELECT
+                    d.code_departement,
+                    c.annee,
+                    c.type_crime,
+                    c.nombre_faits,
+                    s.taux_pour_mille,
+                    d.population,
+                    d.logements
+                FROM crimes c
+                JOIN statistiques s ON c.id_crime = s.id_crime
+                JOIN departements d ON s.code_departement = d.code_departement
+                """
+            )
+
+            # Dépend de stats_departementales, rafraîchie juste avant
+            logger.info("Rafraîchissement de tendances_temporelles...")
+            cursor.execute("DELETE FROM tendances_temporelles")
+            cursor.execute(
+                """
+                INSERT INTO tendances_temporelles
+                (code_departement, annee, type_crime, nombre_faits, taux_pour_mille,
+                 moyenne_mobile, ecart_type, taux_precedent, rang_taux)
+                SELECT
+                    sd.code_departement,
+                    sd.annee,
+                    sd.type_crime,
+                    sd.nombre_faits,
+                    sd.taux_pour_mille,
+                    AVG(sd.taux_pour_mille) OVER fenetre,
+                    STDDEV(sd.taux_pour_mille) OVER fenetre,
+                    LAG(sd.taux_pour_mille) OVER historique,
+                    RANK() OVER (
+                        PARTITION BY sd.code_departement, sd.type_crime
+                        ORDER BY sd.taux_pour_mille DESC
+                    )
+                FROM stats_departementales sd
+                WINDOW
+                    historique AS (
+                        PARTITION BY sd.code_departement, sd.type_crime
+                        ORDER BY sd.annee
+                    ),
+                    -- Fenêtre glissante de 3 ans
+                    fenetre AS (historique ROWS BETWEEN 2 PRECEDING AND CURRENT ROW)
+                """
+            )
+            conn.commit()
+
+        finally:
+            cursor.close()
+            conn.close()
+
+    def load_data(
+        self,
+        source: str = "csv",
+        file_path: Optional[str] = None,
+        bulk_load: bool = False,
+    ) -> None:
         """Charge et traite les données depuis un CSV vers MySQL"""
         try:
             if source == "csv" and file_path:
-                logger.info(f"Lecture du fichier CSV: {file_path}")
+                logger.info("Lecture du fichier CSV: %s", file_path)
 
                 # Lecture et nettoyage
-                df = pd.read_csv(file_path, sep=";", encoding="utf-8", decimal=",")
+                df = pd.read_csv(
+                    file_path,
+                    sep=";",
+                    encoding="utf-8",
+                    decimal=",",
+                    usecols=list(_COLUMN_MAPPING),
+                    engine=_CSV_ENGINE,
+                )
                 df = self._clean_data(df)
-                logger.info(f"Données nettoyées: {len(df)} lignes")
+                logger.info("Données nettoyées: %d lignes", len(df))
 
                 # Préparation des DataFrames
                 crimes_df, departements_df, stats_df = self._prepare_dataframes(df)
 
-                # Connexion à la base de données
-                conn = mysql.connector.connect(**self.config.get_connection_params())
-                cursor = conn.cursor()
-
-                try:
-                    # Insertion des données table par table
-                    logger.info("Insertion des crimes...")
-                    self._insert_data_to_mysql("crimes", crimes_df, cursor)
-
-                    logger.info("Insertion des départements...")
-                    self._insert_data_to_mysql("departements", departements_df, cursor)
-
-                    logger.info("Insertion des statistiques...")
-                    self._insert_data_to_mysql("statistiques", stats_df, cursor)
-
-                    conn.commit()
-                    logger.info("Chargement des données terminé avec succès")
-
-                finally:
-                    cursor.close()
-                    conn.close()
+                # crimes et departements sont indépendantes : insertion concurrente,
+                # chaque worker disposant de sa propre connexion
+                with ThreadPoolExecutor(max_workers=2) as executor:
+                    futures = [
+                        executor.submit(
+                            self._load_table, "crimes", crimes_df, bulk_load
+                        ),
+                        executor.submit(
+                            self._load_table,
+                            "departements",
+                            departements_df,
+                            bulk_load,
+                        ),
+                    ]
+                    for future in futures:
+                        future.result()
+
+                # statistiques référence les deux tables précédentes
+                self._load_table("statistiques", stats_df, bulk_load)
+                self.refresh_rollups()
+                logger.info("Chargement des données terminé avec succès")
 
             else:
                 raise ValueError("Source non valide ou fichier manquant")
 
         except Exception as e:
-            logger.error(f"Erreur lors du chargement des données: {e}")
+            logger.error("Erreur lors du chargement des données: %s", e)
             raise
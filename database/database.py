@@ -1,9 +1,12 @@
 import logging
-from typing import Any, List, Optional
+import threading
+from typing import Any, Dict, List, Optional, Union
 
 import mysql.connector
 import pandas as pd
 from mysql.connector import Error
+from mysql.connector.errors import PoolError
+from mysql.connector.pooling import MySQLConnectionPool
 
 from database.db_config import DatabaseConfig
 
@@ -11,23 +14,58 @@ logger = logging.getLogger(__name__)
 
 
 class DatabaseConnection:
+    # Pool partagé par toutes les instances, créé à la première requête
+    _pool: Optional[MySQLConnectionPool] = None
+    _pool_lock = threading.Lock()
+
     def __init__(self):
         self.config = DatabaseConfig()
 
-    def execute_query(self, query: str, params: Optional[tuple] = None) -> pd.DataFrame:
+    def _connect(self):
+        """Emprunte une connexion au pool, ou en ouvre une s'il est épuisé"""
+        if DatabaseConnection._pool is None:
+            with DatabaseConnection._pool_lock:
+                if DatabaseConnection._pool is None:
+                    DatabaseConnection._pool = MySQLConnectionPool(
+                        pool_name="delinquance",
+                        pool_size=self.config.get_pool_size(),
+                        **self.config.get_connection_params(),
+                    )
+
+        try:
+            return DatabaseConnection._pool.get_connection()
+        except PoolError:
+            logger.warning("Pool de connexions épuisé, connexion directe")
+            return mysql.connector.connect(**self.config.get_connection_params())
+
+    def execute_query(
+        self,
+        query: str,
+        params: Optional[Union[tuple, Dict[str, Any]]] = None,
+        prepared: bool = False,
+    ) -> pd.DataFrame:
         """
         Execute a SQL query and return results as a pandas DataFrame
 
         Args:
             query (str): SQL query to execute
-            params (tuple, optional): Parameters for the query
+            params (tuple | dict, optional): Parameters for the query, positional
+                for %s placeholders or named for %(name)s placeholders
+            prepared (bool): Run the query as a server-side prepared statement,
+                with its rows sent in the binary protocol. Only positional
+                parameters are supported in this mode
 
         Returns:
             pd.DataFrame: Query results
         """
+        conn = cursor = None
         try:
-            conn = mysql.connector.connect(**self.config.get_connection_params())
-            cursor = conn.cursor(dictionary=True)
+            # Une connexion empruntée au pool y retourne à sa fermeture
+            conn = self._connect()
+            # Curseur par défaut : des tuples, sans dictionnaire alloué par ligne.
+            # En mode préparé, les valeurs numériques arrivent en binaire et ne
+            # sont pas reconverties depuis leur forme texte
+            cursor = conn.cursor(prepared=prepared)
 
             if params:
                 cursor.execute(query, params)
@@ -35,15 +73,28 @@ class DatabaseConnection:
                 cursor.execute(query)
 
             results = cursor.fetchall()
-            return pd.DataFrame(results)
+            # Les colonnes DECIMAL arrivent en objets Decimal : converties en
+            # float64 à la construction plutôt que colonne par colonne ensuite
+            return pd.DataFrame.from_records(
+                results, columns=cursor.column_names, coerce_float=True
+            )
 
         except Error as e:
             logger.error(f"Database error: {e}")
             raise
         finally:
-            if "conn" in locals() and conn.is_connected():
-                cursor.close()
-                conn.close()
+            if cursor is not None:
+                try:
+                    cursor.close()
+                except Error:
+                    pass
+            # Toujours fermer : c'est ce qui rend la connexion au pool, même
+            # perdue en cours de requête. Sans ping préalable par is_connected
+            if conn is not None:
+                try:
+                    conn.close()
+                except Error as e:
+                    logger.warning("Fermeture de la connexion impossible: %s", e)
 
     def get_table_columns(self, table_name: str) -> List[str]:
         """Get column names for a specific table"""
@@ -1,6 +1,7 @@
 import os
 from dataclasses import dataclass, field
-from typing import Dict
+from types import MappingProxyType
+from typing import Dict, Mapping, Tuple
 
 from dotenv import load_dotenv
 
@@ -8,9 +9,9 @@ from dotenv import load_dotenv
 load_dotenv()
 
 
-def get_default_tables() -> Dict[str, str]:
-    """Retourne la configuration par défaut des tables"""
-    return {
+# Configuration par défaut des tables, partagée en lecture seule
+_DEFAULT_TABLES: Mapping[str, str] = MappingProxyType(
+    {
         "crimes": """
             CREATE TABLE IF NOT EXISTS crimes (
                 id_crime INT AUTO_INCREMENT PRIMARY KEY,
@@ -20,7 +21,7 @@ def get_default_tables() -> Dict[str, str]:
                 nombre_faits INT NOT NULL,
                 UNIQUE KEY unique_crime_annee (type_crime, annee),
                 INDEX idx_type_crime (type_crime),
-                INDEX idx_annee (annee)
+                INDEX idx_annee_crime_faits (annee, type_crime, nombre_faits)
             ) ENGINE=InnoDB
         """,
         "departements": """
@@ -41,11 +42,85 @@ def get_default_tables() -> Dict[str, str]:
                 FOREIGN KEY (id_crime) REFERENCES crimes(id_crime),
                 FOREIGN KEY (code_departement) REFERENCES departements(code_departement),
                 UNIQUE KEY unique_stat (id_crime, code_departement),
-                INDEX idx_departement (code_departement),
+                INDEX idx_dept_crime_taux (code_departement, id_crime, taux_pour_mille),
                 INDEX idx_crime_dept (id_crime, code_departement)
             ) ENGINE=InnoDB
         """,
+        # Agrégats annuels par région, rafraîchis à chaque chargement
+        "stats_regionales": """
+            CREATE TABLE IF NOT EXISTS stats_regionales (
+                code_region VARCHAR(2) NOT NULL,
+                type_crime VARCHAR(100) NOT NULL,
+                annee INT NOT NULL,
+                taux_moyen DOUBLE NOT NULL,
+                taux_min DOUBLE NOT NULL,
+                taux_max DOUBLE NOT NULL,
+                ecart_type DOUBLE NOT NULL,
+                PRIMARY KEY (code_region, type_crime, annee)
+            ) ENGINE=InnoDB
+        """,
+        # Jointure crimes x statistiques x departements précalculée pour les
+        # analyses de sécurité, rafraîchie à chaque chargement
+        "stats_departementales": """
+            CREATE TABLE IF NOT EXISTS stats_departementales (
+                code_departement VARCHAR(3) NOT NULL,
+                annee INT NOT NULL,
+                type_crime VARCHAR(100) NOT NULL,
+                nombre_faits INT NOT NULL,
+                taux_pour_mille FLOAT NOT NULL,
+                population INT NOT NULL,
+                logements INT NOT NULL,
+                PRIMARY KEY (code_departement, annee, type_crime),
+                INDEX idx_annee_crime (annee, type_crime, nombre_faits, population)
+            ) ENGINE=InnoDB
+        """,
+        # Statistiques glissantes sur 3 ans par département et type de crime,
+        # calculées à partir de stats_departementales à chaque chargement
+        "tendances_temporelles": """
+            CREATE TABLE IF NOT EXISTS tendances_temporelles (
+                code_departement VARCHAR(3) NOT NULL,
+                annee INT NOT NULL,
+                type_crime VARCHAR(100) NOT NULL,
+                nombre_faits INT NOT NULL,
+                taux_pour_mille FLOAT NOT NULL,
+                moyenne_mobile DOUBLE NOT NULL,
+                ecart_type DOUBLE NOT NULL,
+                taux_precedent FLOAT NULL,
+                rang_taux INT NOT NULL,
+                PRIMARY KEY (code_departement, annee, type_crime)
+            ) ENGINE=InnoDB
+        """,
+        # Référentiel des types de crime retenus par l'analyse transport
+        "types_crime_transport": """
+            CREATE TABLE IF NOT EXISTS types_crime_transport (
+                type_crime VARCHAR(100) PRIMARY KEY
+            ) ENGINE=InnoDB
+        """,
     }
+)
+
+# Contenu de types_crime_transport, inséré au démarrage s'il manque
+_TRANSPORT_CRIME_TYPES: Tuple[str, ...] = (
+    "Vols avec armes",
+    "Vols violents sans arme",
+    "Vols dans les véhicules",
+    "Vols de véhicules",
+    "Vols d'accessoires sur véhicules",
+    "Destructions et dégradations volontaires",
+)
+
+# Index couvrants des requêtes d'analyse : nom -> (table, colonnes). Les
+# clés secondaires InnoDB contiennent la clé primaire, donc id_crime est
+# aussi couvert côté crimes. Recréés au démarrage s'ils manquent
+_DEFAULT_INDEXES: Mapping[str, Tuple[str, str]] = MappingProxyType(
+    {
+        "idx_annee_crime_faits": ("crimes", "annee, type_crime, nombre_faits"),
+        "idx_dept_crime_taux": (
+            "statistiques",
+            "code_departement, id_crime, taux_pour_mille",
+        ),
+    }
+)
 
 
 @dataclass
@@ -54,7 +129,12 @@ class DatabaseConfig:
     USER: str = os.getenv("MYSQL_USER", "root")
     PASSWORD: str = os.getenv("MYSQL_PASSWORD", "")
     DATABASE: str = os.getenv("MYSQL_DATABASE", "delinquance_db")
-    TABLES: Dict[str, str] = field(default_factory=get_default_tables)
+    TABLES: Mapping[str, str] = field(default_factory=lambda: _DEFAULT_TABLES)
+    INDEXES: Mapping[str, Tuple[str, str]] = field(
+        default_factory=lambda: _DEFAULT_INDEXES
+    )
+    TRANSPORT_CRIME_TYPES: Tuple[str, ...] = _TRANSPORT_CRIME_TYPES
+    CSV_SOURCES: Tuple[str, ...] = ("donnee-del-data.gouv.csv",)
 
     @classmethod
     def get_connection_params(cls) -> Dict[str, str]:
@@ -66,6 +146,16 @@ class DatabaseConfig:
             "database": cls.DATABASE,
         }
 
+    @classmethod
+    def get_pool_size(cls) -> int:
+        """Retourne le nombre de connexions gardées ouvertes dans le pool"""
+        return int(os.getenv("MYSQL_POOL_SIZE", "8"))
+
+    @classmethod
+    def get_bulk_load(cls) -> bool:
+        """Indique si le chargement initial désactive les clés étrangères"""
+        return os.getenv("MYSQL_BULK_LOAD", "false").lower() in ("1", "true", "yes")
+
     @classmethod
     def get_batch_size(cls) -> int:
         """Retourne la taille des lots pour les insertions"""
@@ -1,4 +1,5 @@
 import logging
+from typing import Optional
 
 import mysql.connector
 from mysql.connector import Error
@@ -10,32 +11,74 @@ logger = logging.getLogger(__name__)
 
 
 class DatabaseInitializer:
+    # DDL concaténé une seule fois, partagé par toutes les instances
+    _schema_script: Optional[str] = None
+
     def __init__(self):
         self.config = DatabaseConfig()
         self.data_loader = DataLoader()
 
-    def _check_data_exists(self, cursor) -> bool:
-        """Vérifie si des données existent déjà dans la base"""
+    def _check_data_exists(self, cursor, table_name: str = "statistiques") -> bool:
+        """Vérifie si des données existent déjà dans une table de la base"""
         try:
-            cursor.execute("SELECT COUNT(*) as count FROM statistiques")
+            cursor.execute(f"SELECT 1 FROM {table_name} LIMIT 1")
             result = cursor.fetchone()
-            return result[0] > 0
+            return result is not None
         except Error:
             return False
 
     def _initialize_tables(self, cursor) -> None:
-        """Initialise toutes les tables de la base de données"""
-        for table_name, table_description in self.config.TABLES.items():
+        """Initialise toutes les tables en un seul aller-retour"""
+        if DatabaseInitializer._schema_script is None:
+            DatabaseInitializer._schema_script = ";".join(self.config.TABLES.values())
+
+        try:
+            logger.info("Création des tables %s", ", ".join(self.config.TABLES))
+            # Le script multi-instructions doit être entièrement consommé
+            for _ in cursor.execute(self._schema_script, multi=True):
+                pass
+        except Error as e:
+            logger.error("Erreur lors de la création des tables: %s", e)
+            raise
+
+    def _ensure_indexes(self, cursor) -> None:
+        """Crée les index couvrants absents d'une base créée avant leur ajout"""
+        cursor.execute(
+            """
+            SELECT DISTINCT INDEX_NAME
+            FROM INFORMATION_SCHEMA.STATISTICS
+            WHERE TABLE_SCHEMA = %s
+            """,
+            (self.config.DATABASE,),
+        )
+        existing = {name for (name,) in cursor.fetchall()}
+
+        for index_name, (table, columns) in self.config.INDEXES.items():
+            if index_name in existing:
+                continue
             try:
-                logger.info(f"Création de la table {table_name}")
-                cursor.execute(table_description)
+                logger.info("Création de l'index %s sur %s", index_name, table)
+                cursor.execute(f"CREATE INDEX {index_name} ON {table} ({columns})")
             except Error as e:
                 logger.error(
-                    f"Erreur lors de la création de la table {table_name}: {e}"
+                    "Erreur lors de la création de l'index %s: %s", index_name, e
                 )
                 raise
 
-    def create_database(self, force_reload: bool = False) -> None:
+    def _seed_reference_tables(self, cursor) -> None:
+        """Remplit les tables de référence, sans doublon si elles existent"""
+        try:
+            cursor.executemany(
+                "INSERT IGNORE INTO types_crime_transport (type_crime) VALUES (%s)",
+                [(type_crime,) for type_crime in self.config.TRANSPORT_CRIME_TYPES],
+            )
+        except Error as e:
+            logger.error("Erreur lors du remplissage des référentiels: %s", e)
+            raise
+
+    def create_database(
+        self, force_reload: bool = False, bulk_load: bool = False
+    ) -> None:
         """Crée la base de données et charge les données initiales"""
         try:
             # Connexion sans sélectionner de base de données
@@ -49,9 +92,13 @@ class DatabaseInitializer:
             # Création de la base de données
             try:
                 cursor.execute(f"CREATE DATABASE IF NOT EXISTS {self.config.DATABASE}")
-                logger.info(f"Base de données {self.config.DATABASE} créée avec succès")
+                logger.info(
+                    "Base de données %s créée avec succès", self.config.DATABASE
+                )
             except Error as e:
-                logger.error(f"Erreur lors de la création de la base de données: {e}")
+                logger.error(
+                    "Erreur lors de la création de la base de données: %s", e
+                )
                 raise
 
             # Sélection de la base de données
@@ -59,6 +106,9 @@ class DatabaseInitializer:
 
             # Initialisation des tables
             self._initialize_tables(cursor)
+            self._ensure_indexes(cursor)
+            self._seed_reference_tables(cursor)
+            conn.commit()
 
             # Vérifier si les données existent déjà
             data_exists = self._check_data_exists(cursor)
@@ -67,21 +117,31 @@ class DatabaseInitializer:
                 # Chargement des données initiales avec Pandas et DataLoader
                 try:
                     logger.info("Chargement des données initiales...")
-                    self.data_loader.load_data(
-                        source="csv",
-                        file_path="donnee-del-data.gouv.csv",
-                    )
+                    for file_path in self.config.CSV_SOURCES:
+                        self.data_loader.load_data(
+                            source="csv", file_path=file_path, bulk_load=bulk_load
+                        )
                     logger.info("Données initiales chargées avec succès")
                 except Exception as e:
                     logger.error(
-                        f"Erreur lors du chargement des données initiales: {e}"
+                        "Erreur lors du chargement des données initiales: %s", e
                     )
                     raise
             else:
                 logger.info("Les données existent déjà dans la base")
+                # Base chargée avant l'ajout des agrégats : on les calcule une fois
+                if not all(
+                    self._check_data_exists(cursor, table)
+                    for table in (
+                        "stats_regionales",
+                        "stats_departementales",
+                        "tendances_temporelles",
+                    )
+                ):
+                    self.data_loader.refresh_rollups()
 
         except Error as e:
-            logger.error(f"Erreur lors de la connexion à MySQL: {e}")
+            logger.error("Erreur lors de la connexion à MySQL: %s", e)
             raise
         finally:
             if "conn" in locals() and conn.is_connected():
@@ -2,6 +2,7 @@ import logging
 import traceback
 
 from app import create_and_launch_interface
+from database.db_config import DatabaseConfig
 from database.init_db import DatabaseInitializer
 
 logging.basicConfig(
@@ -14,13 +15,18 @@ logging.basicConfig(
 )
 logger = logging.getLogger("main")
 
+# Les bibliothèques tierces ne remontent que les avertissements
+for third_party in ("mysql", "urllib3", "httpx", "matplotlib"):
+    logging.getLogger(third_party).setLevel(logging.WARNING)
+
 
 def main():
     try:
         logger.info("Démarrage de l'application")
         # Initialisation de la base de données
         db_init = DatabaseInitializer()
-        db_init.create_database()
+        # Chargement accéléré sur demande uniquement (MYSQL_BULK_LOAD=true)
+        db_init.create_database(bulk_load=DatabaseConfig.get_bulk_load())
 
         # Paramètres pour le lancement de l'interface
         share = False
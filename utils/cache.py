@@ -0,0 +1,64 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Hashable, Optional, Tuple
+
+import pandas as pd
+
+
+class ResultCache:
+    """Cache LRU des résultats (DataFrame, recommandations) des services
+
+    Avec `ttl`, une entrée plus ancienne que ce nombre de secondes est
+    ignorée et retirée à la lecture, pour que les résultats finissent par
+    refléter un rechargement des données même sans appel à `clear`.
+    """
+
+    def __init__(self, maxsize: int = 128, ttl: Optional[float] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Tuple[pd.DataFrame, str]]:
+        """Retourne une copie du résultat mis en cache, ou None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, df, recommendations = entry
+            if expires_at is not None and time.monotonic() >= expires_at:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+
+        # Copie défensive : l'appelant ne doit pas modifier l'entrée en cache
+        return df.copy(), recommendations
+
+    def set(self, key: Hashable, df: pd.DataFrame, recommendations: str) -> None:
+        """Enregistre un résultat en évinçant le moins récemment utilisé"""
+        expires_at = None if self.ttl is None else time.monotonic() + self.ttl
+        with self._lock:
+            self._entries[key] = (expires_at, df.copy(), recommendations)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def get_or_compute(
+        self, key: Hashable, analysis: Callable, *args
+    ) -> Tuple[pd.DataFrame, str]:
+        """Exécute une analyse en réutilisant le résultat d'un appel identique"""
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+
+        df, recommendations = analysis(*args)
+        # Les erreurs et résultats vides ne sont pas mis en cache
+        if not df.empty:
+            self.set(key, df, recommendations)
+        return df, recommendations
+
+    def clear(self) -> None:
+        """Vide le cache, à appeler après un rechargement des données"""
+        with self._lock:
+            self._entries.clear()
@@ -1,19 +1,111 @@
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from typing import Tuple
 
 import gradio as gr
+import numpy as np
 import pandas as pd
 
 from database.database import DatabaseConnection
+from utils.cache import ResultCache
 from view.predictive_view import PredictiveVisualization
 
 logger = logging.getLogger(__name__)
 
+# Colonnes des statistiques de régression renvoyées par groupe
+_N, _X_MEAN, _Y_MEAN, _SLOPE, _R_SQUARED, _STD = range(6)
+
+
+def _group_regression_loop(x, y, group_ids, n_groups):
+    """Régression linéaire par groupe en une passe de boucles (compilée par numba)"""
+    stats = np.zeros((n_groups, 6))
+    for i in range(x.shape[0]):
+        g = group_ids[i]
+        stats[g, _N] += 1.0
+        stats[g, _X_MEAN] += x[i]
+        stats[g, _Y_MEAN] += y[i]
+    for g in range(n_groups):
+        stats[g, _X_MEAN] /= stats[g, _N]
+        stats[g, _Y_MEAN] /= stats[g, _N]
+
+    sxx = np.zeros(n_groups)
+    syy = np.zeros(n_groups)
+    sxy = np.zeros(n_groups)
+    for i in range(x.shape[0]):
+        g = group_ids[i]
+        dx = x[i] - stats[g, _X_MEAN]
+        dy = y[i] - stats[g, _Y_MEAN]
+        sxx[g] += dx * dx
+        syy[g] += dy * dy
+        sxy[g] += dx * dy
+
+    for g in range(n_groups):
+        stats[g, _SLOPE] = sxy[g] / sxx[g] if sxx[g] > 0 else np.nan
+        if sxx[g] > 0 and syy[g] > 0:
+            stats[g, _R_SQUARED] = sxy[g] * sxy[g] / (sxx[g] * syy[g])
+        # Écart-type de population, comme STD() côté MySQL
+        stats[g, _STD] = np.sqrt(syy[g] / stats[g, _N])
+    return stats
+
+
+def _group_regression_numpy(x, y, group_ids, n_groups):
+    """Régression linéaire par groupe, vectorisée avec bincount"""
+    n = np.bincount(group_ids, minlength=n_groups).astype(float)
+    x_mean = np.bincount(group_ids, x, n_groups) / n
+    y_mean = np.bincount(group_ids, y, n_groups) / n
+    dx = x - x_mean[group_ids]
+    dy = y - y_mean[group_ids]
+    sxx = np.bincount(group_ids, dx * dx, n_groups)
+    syy = np.bincount(group_ids, dy * dy, n_groups)
+    sxy = np.bincount(group_ids, dx * dy, n_groups)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        slope = np.where(sxx > 0, sxy / sxx, np.nan)
+        r_squared = np.where((sxx > 0) & (syy > 0), sxy**2 / (sxx * syy), 0.0)
+    # Écart-type de population, comme STD() côté MySQL
+    std = np.sqrt(syy / n)
+    return np.column_stack([n, x_mean, y_mean, slope, r_squared, std])
+
+
+# numba compile la boucle en code natif ; repli sur la version NumPy sinon
+try:
+    from numba import njit
+
+    _group_regression = njit(cache=True, nogil=True)(_group_regression_loop)
+except ImportError:
+    _group_regression = _group_regression_numpy
+
+# Gabarits des recommandations, remplis par format_map ligne à ligne
+_PROJECTION_TEMPLATE = (
+    "\n{type_crime}:\n"
+    "- Projection 20{target_year}: {projection:.1f}‰ "
+    "({variation:+.1f}% vs. dernière valeur historique)\n"
+    "- Intervalle de confiance: [{lower_bound:.1f} - {upper_bound:.1f}]‰"
+)
+_TREND_TEMPLATE = (
+    "- {type_crime}: {tendance} (Variation projetée: {variation_projetee:+.1f}%)"
+)
+_CORRELATION_TEMPLATE = (
+    "- {type_crime} et {type_crime_2} "
+    "évoluent de manière similaire (corr: {abs_correlation:.2f})"
+)
+_PRIORITY_TEMPLATE = (
+    "- {type_crime}: déjà supérieur à la moyenne et "
+    "projection en forte hausse (+{variation_projetee:.1f}%)"
+)
+
+# Espace réservé partagé par toutes les sorties sans graphique ; un tuple
+# immuable évite qu'un graphique rempli ne fuie dans les retours vides
+_EMPTY_PLOT = gr.Plot()
+_EMPTY_PLOTS = (_EMPTY_PLOT, _EMPTY_PLOT)
+
 
 class PredictiveService:
     def __init__(self):
         self.db = DatabaseConnection()
         self.visualizer = PredictiveVisualization()
+        # Un même résultat est réutilisé au plus cinq minutes
+        self.cache = ResultCache(maxsize=1024, ttl=300)
 
     def process_request(
         self,
@@ -24,12 +116,10 @@ class PredictiveService:
     ) -> Tuple[pd.DataFrame, str, gr.Plot, gr.Plot]:
         """Traite les requêtes d'analyse prédictive"""
         try:
-            empty_plots = [gr.Plot(), gr.Plot()]
-
             if service == "Projection Criminelle":
                 # Vérification des paramètres
                 if not dept:
-                    return pd.DataFrame(), "Erreur: Département requis", *empty_plots
+                    return pd.DataFrame(), "Erreur: Département requis", *_EMPTY_PLOTS
 
                 # Conversion et validation de l'année cible
                 try:
@@ -38,202 +128,101 @@ class PredictiveService:
                         return (
                             pd.DataFrame(),
                             "Erreur: L'année de prédiction doit être entre 24 et 30",
-                            *empty_plots,
+                            *_EMPTY_PLOTS,
                         )
                 except ValueError:
-                    return pd.DataFrame(), "Erreur: Année invalide", *empty_plots
-
-                df, recommendations = self._projection_criminelle(
-                    dept, crime_type, target_year
+                    return pd.DataFrame(), "Erreur: Année invalide", *_EMPTY_PLOTS
+
+                df, recommendations = self.cache.get_or_compute(
+                    (service, dept, crime_type, target_year),
+                    self._projection_criminelle,
+                    dept,
+                    crime_type,
+                    target_year,
                 )
                 if df.empty:
-                    return df, recommendations, *empty_plots
-
-                plots = empty_plots
-                # Création de la courbe de projection
-                projection = self.visualizer.create_projection_curve(df)
-                if projection is not None:
-                    plots[0] = gr.Plot(projection)
+                    return df, recommendations, *_EMPTY_PLOTS
 
-                # Création de la heatmap des prédictions
-                heatmap = self.visualizer.create_prediction_heatmap(df)
-                if heatmap is not None:
-                    plots[1] = gr.Plot(heatmap)
+                # Courbe de projection et heatmap en un seul parcours des séries
+                projection, heatmap = self.visualizer.build_projection_plots(df)
 
-                return df, recommendations, *plots
+                return (
+                    df,
+                    recommendations,
+                    self._to_plot(projection),
+                    self._to_plot(heatmap),
+                )
 
             elif service == "Analyse des Risques Émergents":
                 if not dept:
-                    return pd.DataFrame(), "Erreur: Département requis", *empty_plots
+                    return pd.DataFrame(), "Erreur: Département requis", *_EMPTY_PLOTS
 
-                df, recommendations = self._analyse_risques(dept)
+                df, recommendations = self.cache.get_or_compute(
+                    (service, dept), self._analyse_risques, dept
+                )
                 if df.empty:
-                    return df, recommendations, *empty_plots
-
-                plots = empty_plots
-                variations = self.visualizer.create_risk_variations(df)
-                if variations is not None:
-                    plots[0] = gr.Plot(variations)
-
-                correlations = self.visualizer.create_crime_correlations(df)
-                if correlations is not None:
-                    plots[1] = gr.Plot(correlations)
-
-                return df, recommendations, *plots
+                    return df, recommendations, *_EMPTY_PLOTS
+
+                # Les deux graphiques sont indépendants : construction concurrente
+                with ThreadPoolExecutor(max_workers=2) as executor:
+                    # Une barre par type de crime, sans les lignes de corrélation
+                    variations_future = executor.submit(
+                        self.visualizer.create_risk_variations,
+                        df.drop_duplicates("type_crime"),
+                    )
+                    correlations_future = executor.submit(
+                        self.visualizer.create_crime_correlations, df
+                    )
+                    variations = variations_future.result()
+                    correlations = correlations_future.result()
+
+                return (
+                    df,
+                    recommendations,
+                    self._to_plot(variations),
+                    self._to_plot(correlations),
+                )
 
             else:
-                return pd.DataFrame(), "Service non reconnu", *empty_plots
+                return pd.DataFrame(), "Service non reconnu", *_EMPTY_PLOTS
 
         except Exception as e:
             logger.error(f"Erreur dans process_request: {str(e)}")
-            return pd.DataFrame(), f"Erreur: {str(e)}", *empty_plots
+            return pd.DataFrame(), f"Erreur: {str(e)}", *_EMPTY_PLOTS
+
+    @staticmethod
+    def _to_plot(figure) -> gr.Plot:
+        """Encapsule une figure, ou renvoie l'espace réservé si elle est absente"""
+        return gr.Plot(figure) if figure is not None else _EMPTY_PLOT
+
+    def _fetch_history(self, department: str, crime_type: str = None) -> pd.DataFrame:
+        """Récupère les taux observés d'un département, par crime et année"""
+        # Filtre ajouté seulement si demandé : un "OR ... IS NULL" empêcherait
+        # l'utilisation de l'index sur type_crime
+        crime_filter = "AND c.type_crime = %s" if crime_type else ""
+        query = f"""
+        SELECT 
+            s.code_departement,
+            c.type_crime,
+            c.annee,
+            s.taux_pour_mille
+        FROM crimes c
+        JOIN statistiques s ON c.id_crime = s.id_crime
+        WHERE s.code_departement = %s
+        {crime_filter}
+        ORDER BY c.type_crime, c.annee;
+        """
+        params = (department, crime_type) if crime_type else (department,)
+        # Requête préparée : taux transmis en binaire, sans analyse du texte
+        return self.db.execute_query(query, params, prepared=True)
 
     def _projection_criminelle(
         self, department: str, crime_type: str = None, target_year: int = 25
     ) -> Tuple[pd.DataFrame, str]:
         """Analyse et projette l'évolution des crimes jusqu'à l'année cible"""
-        query = """
-        WITH RECURSIVE Annees AS (
-            -- Sélection de la plus petite année dans les données
-            SELECT MIN(c.annee) as annee
-            FROM crimes c
-            JOIN statistiques s ON c.id_crime = s.id_crime
-            WHERE s.code_departement = %s
-            AND (c.type_crime = %s OR %s IS NULL)
-            
-            UNION ALL
-            
-            SELECT annee + 1
-            FROM Annees
-            WHERE annee < %s  -- Utilisation de l'année cible
-        ),
-        BaseData AS (
-            SELECT 
-                s.code_departement,
-                c.type_crime,
-                c.annee,
-                s.taux_pour_mille
-            FROM crimes c
-            JOIN statistiques s ON c.id_crime = s.id_crime
-            WHERE s.code_departement = %s
-            AND (c.type_crime = %s OR %s IS NULL)
-        ),
-        RegressionStats AS (
-            SELECT
-                code_departement,
-                type_crime,
-                COUNT(*) as n_points,
-                AVG(annee) as x_mean,
-                AVG(taux_pour_mille) as y_mean,
-                AVG(annee * taux_pour_mille) as xy_mean,
-                AVG(annee * annee) as x2_mean,
-                AVG(taux_pour_mille * taux_pour_mille) as y2_mean,
-                STD(taux_pour_mille) as std_dev
-            FROM BaseData
-            GROUP BY code_departement, type_crime
-            HAVING COUNT(*) > 1
-        ),
-        RegressionParams AS (
-            SELECT 
-                r.*,
-                (xy_mean - x_mean * y_mean) / NULLIF(x2_mean - x_mean * x_mean, 0) as slope,
-                POWER(
-                    (xy_mean - x_mean * y_mean) / 
-                    SQRT(
-                        NULLIF(
-                            (x2_mean - x_mean * x_mean) * 
-                            (y2_mean - y_mean * y_mean),
-                            0
-                        )
-                    ),
-                    2
-                ) as r_squared
-            FROM RegressionStats r
-        ),
-        AllYearsCombined AS (
-            SELECT 
-                bd.code_departement,
-                bd.type_crime,
-                a.annee
-            FROM BaseData bd
-            CROSS JOIN Annees a
-            GROUP BY bd.code_departement, bd.type_crime, a.annee
-        ),
-        LastHistoricalYear AS (
-            SELECT MAX(annee) as derniere_annee
-            FROM BaseData
-        ),
-        Projections AS (
-            SELECT 
-                a.code_departement,
-                a.type_crime,
-                a.annee,
-                ROUND(
-                    (r.y_mean - (r.slope * r.x_mean)) + (r.slope * a.annee),
-                    2
-                ) as projection,
-                ROUND(
-                    (r.y_mean - (r.slope * r.x_mean)) + (r.slope * a.annee)
-                    - (1.96 * r.std_dev),
-                    2
-                ) as lower_bound,
-                ROUND(
-                    (r.y_mean - (r.slope * r.x_mean)) + (r.slope * a.annee)
-                    + (1.96 * r.std_dev),
-                    2
-                ) as upper_bound,
-                r.slope,
-                r.n_points,
-                COALESCE(r.r_squared, 0) as r_squared,
-                CASE 
-                    WHEN a.annee > (SELECT derniere_annee FROM LastHistoricalYear) THEN 'PROJECTION'
-                    ELSE 'HISTORIQUE'
-                END as data_type
-            FROM AllYearsCombined a
-            JOIN RegressionParams r ON a.code_departement = r.code_departement 
-                AND a.type_crime = r.type_crime
-        ),
-        FinalData AS (
-            SELECT 
-                p.*,
-                CASE 
-                    WHEN p.data_type = 'HISTORIQUE' THEN 
-                        (SELECT b.taux_pour_mille 
-                        FROM BaseData b 
-                        WHERE b.code_departement = p.code_departement 
-                        AND b.type_crime = p.type_crime 
-                        AND b.annee = p.annee)
-                    ELSE p.projection
-                END as final_value
-            FROM Projections p
-        )
-        SELECT 
-            code_departement,
-            type_crime,
-            annee,
-            ROUND(COALESCE(final_value, projection), 2) as projection,
-            lower_bound,
-            upper_bound,
-            slope,
-            n_points,
-            r_squared,
-            data_type
-        FROM FinalData
-        ORDER BY type_crime, annee;
-        """
-
         try:
-            # Ajout de l'année cible dans les paramètres de la requête
-            params = (
-                department,
-                crime_type,
-                crime_type,
-                target_year,  # Nouvelle année cible
-                department,
-                crime_type,
-                crime_type,  # Répétition des paramètres pour BaseData
-            )
-            df = self.db.execute_query(query, params)
+            history = self._fetch_history(department, crime_type)
+            df = self._fit_projections(history, target_year)
             recommendations = self._generate_projection_recommendations(df, target_year)
             return df, recommendations
 
@@ -241,112 +230,67 @@ class PredictiveService:
             logger.error(f"Erreur dans _projection_criminelle: {str(e)}")
             return pd.DataFrame(), f"Erreur lors de l'analyse des projections: {str(e)}"
 
-    def _analyse_risques(self, department: str) -> Tuple[pd.DataFrame, str]:
-        """Analyse les tendances et corrélations entre types de crimes"""
-        query = """
-        WITH BaseData AS (
-            SELECT 
-                s.code_departement,
-                c.type_crime,
-                c.annee,
-                s.taux_pour_mille,
-                (
-                    SELECT taux_pour_mille 
-                    FROM statistiques s2 
-                    JOIN crimes c2 ON c2.id_crime = s2.id_crime
-                    WHERE s2.code_departement = s.code_departement 
-                    AND c2.type_crime = c.type_crime 
-                    AND c2.annee < c.annee 
-                    ORDER BY c2.annee DESC 
-                    LIMIT 1
-                ) as taux_precedent
-            FROM crimes c
-            JOIN statistiques s ON c.id_crime = s.id_crime
-            WHERE s.code_departement = %s
-        ),
-        GrowthStats AS (
-            SELECT 
-                code_departement,
-                type_crime,
-                AVG(
-                    CASE 
-                        WHEN taux_precedent IS NULL OR taux_precedent = 0 THEN 0
-                        ELSE (taux_pour_mille - taux_precedent) / taux_precedent
-                    END
-                ) as taux_croissance,
-                MAX(CASE WHEN annee = (SELECT MAX(annee) FROM BaseData b2 WHERE b2.type_crime = BaseData.type_crime) 
-                    THEN taux_pour_mille END) as derniere_valeur
-            FROM BaseData
-            GROUP BY code_departement, type_crime
-        ),
-        Projections AS (
-            SELECT 
-                code_departement,
-                type_crime,
-                taux_croissance,
-                derniere_valeur,
-                ROUND(
-                    derniere_valeur * (1 + taux_croissance),
-                    2
-                ) as projection_2024,
-                CASE
-                    WHEN taux_croissance > 0.1 THEN 'FORTE_HAUSSE'
-                    WHEN taux_croissance > 0.05 THEN 'HAUSSE_MODEREE'
-                    WHEN taux_croissance < -0.1 THEN 'FORTE_BAISSE'
-                    WHEN taux_croissance < -0.05 THEN 'BAISSE_MODEREE'
-                    ELSE 'STABLE'
-                END as tendance,
-                ROUND(
-                    taux_croissance * 100,
-                    2
-                ) as variation_projetee
-            FROM GrowthStats
-        ),
-        CorrelationData AS (
-            SELECT 
-                p1.code_departement,
-                p1.type_crime,
-                p1.taux_croissance,
-                p1.derniere_valeur,
-                p1.projection_2024,
-                p1.tendance,
-                p1.variation_projetee,
-                p2.type_crime as type_crime_2,
-                ROUND(
-                    (
-                        SELECT 
-                            (COUNT(*) * SUM(b1.taux_pour_mille * b2.taux_pour_mille) - 
-                            SUM(b1.taux_pour_mille) * SUM(b2.taux_pour_mille)) /
-                            SQRT(
-                                (COUNT(*) * SUM(b1.taux_pour_mille * b1.taux_pour_mille) - 
-                                POW(SUM(b1.taux_pour_mille), 2)) *
-                                (COUNT(*) * SUM(b2.taux_pour_mille * b2.taux_pour_mille) - 
-                                POW(SUM(b2.taux_pour_mille), 2))
-                            )
-                        FROM BaseData b1
-                        JOIN BaseData b2 ON b1.annee = b2.annee 
-                        WHERE b1.type_crime = p1.type_crime
-                        AND b2.type_crime = p2.type_crime
-                    ),
-                    2
-                ) as correlation
-            FROM Projections p1
-            CROSS JOIN Projections p2
+    def _fit_projections(self, history: pd.DataFrame, target_year: int) -> pd.DataFrame:
+        """Régression linéaire par type de crime, projetée jusqu'à l'année cible"""
+        if history.empty:
+            return pd.DataFrame()
+
+        # Identifiants entiers des groupes, dans l'ordre d'apparition
+        grouping = history.groupby(["code_departement", "type_crime"], sort=False)
+        group_ids = grouping.ngroup().to_numpy()
+        keys = history.loc[:, ["code_departement", "type_crime"]].drop_duplicates()
+        annees = history["annee"].to_numpy()
+        rates = history["taux_pour_mille"].to_numpy(dtype=float)
+
+        stats = _group_regression(annees.astype(float), rates, group_ids, len(keys))
+        # Au moins deux points sont nécessaires pour une régression
+        kept = stats[:, _N] > 1
+        if not kept.any():
+            return pd.DataFrame()
+
+        # Grille commune : de la première année observée à l'année cible.
+        # Années et effectifs tiennent sur int16 ; les taux restent en float64,
+        # float32 ferait apparaître des décimales parasites dans le tableau affiché
+        years = np.arange(annees.min(), target_year + 1, dtype=np.int16)
+        fitted = stats[:, _Y_MEAN, None] + stats[:, _SLOPE, None] * (
+            years - stats[:, _X_MEAN, None]
+        )
+        margin = 1.96 * stats[:, _STD, None]
+
+        # Valeur observée si elle existe, projection sinon
+        observed = np.full(fitted.shape, np.nan)
+        in_grid = annees <= target_year
+        observed[group_ids[in_grid], annees[in_grid] - years[0]] = rates[in_grid]
+        projection = np.where(np.isnan(observed), fitted, observed)[kept]
+
+        fitted = fitted[kept]
+        margin = margin[kept]
+        stats = stats[kept]
+        keys = keys[kept]
+        n_years = len(years)
+
+        return pd.DataFrame(
+            {
+                "code_departement": np.repeat(
+                    keys["code_departement"].to_numpy(), n_years
+                ),
+                "type_crime": np.repeat(keys["type_crime"].to_numpy(), n_years),
+                "annee": np.tile(years, len(keys)),
+                "projection": np.round(projection, 2).ravel(),
+                "lower_bound": np.round(fitted - margin, 2).ravel(),
+                "upper_bound": np.round(fitted + margin, 2).ravel(),
+                "slope": np.repeat(stats[:, _SLOPE], n_years),
+                "n_points": np.repeat(stats[:, _N].astype(np.int16), n_years),
+                "r_squared": np.repeat(stats[:, _R_SQUARED], n_years),
+                "data_type": np.tile(
+                    np.where(years > annees.max(), "PROJECTION", "HISTORIQUE"),
+                    len(keys),
+                ),
+            }
         )
-        SELECT 
-            code_departement,
-            type_crime,
-            type_crime_2,
-            taux_croissance,
-            derniere_valeur,
-            projection_2024,
-            tendance,
-            variation_projetee,
-            correlation
-        FROM CorrelationData
-        ORDER BY type_crime, type_crime_2;
-        """
 
+    def _analyse_risques(self, department: str) -> Tuple[pd.DataFrame, str]:
+        """Analyse les tendances et corrélations entre types de crimes"""
         try:
             if not department:
                 logger.error("Paramètre département manquant")
@@ -355,14 +299,20 @@ class PredictiveService:
             logger.info(
                 f"Exécution de l'analyse des risques pour le département {department}"
             )
-            df = self.db.execute_query(query, (department,))
+            history = self._fetch_history(department)
 
-            if df.empty:
+            if history.empty:
                 logger.warning(
                     f"Aucune donnée trouvée pour le département {department}"
                 )
-                return df, f"Aucune donnée disponible pour le département {department}"
+                return (
+                    pd.DataFrame(),
+                    f"Aucune donnée disponible pour le département {department}",
+                )
 
+            df = self._merge_correlations(
+                self._risk_projections(history), self._crime_correlations(history)
+            )
             recommendations = self._generate_risk_recommendations(df)
 
             logger.info(
@@ -375,6 +325,94 @@ class PredictiveService:
             logger.error(error_msg)
             return pd.DataFrame(), f"Erreur lors de l'analyse des risques : {str(e)}"
 
+    def _risk_projections(self, history: pd.DataFrame) -> pd.DataFrame:
+        """Croissance moyenne, dernière valeur et tendance de chaque type de crime"""
+        rates = history["taux_pour_mille"].to_numpy(dtype=float)
+        keys = ["code_departement", "type_crime"]
+        previous = history.groupby(keys, sort=False)["taux_pour_mille"].shift()
+        previous = previous.to_numpy(dtype=float)
+
+        # Croissance nulle pour la première année et les taux précédents nuls
+        valid = ~np.isnan(previous) & (previous != 0)
+        growth = np.zeros_like(rates)
+        growth[valid] = (rates[valid] - previous[valid]) / previous[valid]
+
+        projections = (
+            history.loc[:, keys]
+            .assign(croissance=growth, taux_pour_mille=rates)
+            .groupby(keys, sort=False)
+            .agg(
+                taux_croissance=("croissance", "mean"),
+                derniere_valeur=("taux_pour_mille", "last"),
+            )
+            .reset_index()
+        )
+
+        taux_croissance = projections["taux_croissance"].to_numpy()
+        projections["projection_2024"] = np.round(
+            projections["derniere_valeur"].to_numpy() * (1 + taux_croissance), 2
+        )
+        projections["tendance"] = np.select(
+            [
+                taux_croissance > 0.1,
+                taux_croissance > 0.05,
+                taux_croissance < -0.1,
+                taux_croissance < -0.05,
+            ],
+            ["FORTE_HAUSSE", "HAUSSE_MODEREE", "FORTE_BAISSE", "BAISSE_MODEREE"],
+            default="STABLE",
+        )
+        projections["variation_projetee"] = np.round(taux_croissance * 100, 2)
+        return projections
+
+    def _crime_correlations(self, history: pd.DataFrame) -> pd.DataFrame:
+        """Corrélation de Pearson de chaque paire de crimes, années communes"""
+        matrix = (
+            history.pivot(index="annee", columns="type_crime", values="taux_pour_mille")
+            .astype(float)
+            .corr()
+            .round(2)
+        )
+        return (
+            matrix.rename_axis(index="type_crime", columns=None)
+            .reset_index()
+            .melt(
+                id_vars="type_crime",
+                var_name="type_crime_2",
+                value_name="correlation",
+            )
+        )
+
+    def _merge_correlations(
+        self, projections: pd.DataFrame, correlations: pd.DataFrame
+    ) -> pd.DataFrame:
+        """Associe à chaque projection ses corrélations avec les autres crimes"""
+        # Toutes les paires, même celles sans année commune (corrélation nulle)
+        pairs = projections.merge(
+            projections[["type_crime"]].rename(columns={"type_crime": "type_crime_2"}),
+            how="cross",
+        )
+        if correlations.empty:
+            pairs["correlation"] = np.nan
+        else:
+            pairs = pairs.merge(
+                correlations, on=["type_crime", "type_crime_2"], how="left"
+            )
+
+        return pairs[
+            [
+                "code_departement",
+                "type_crime",
+                "type_crime_2",
+                "taux_croissance",
+                "derniere_valeur",
+                "projection_2024",
+                "tendance",
+                "variation_projetee",
+                "correlation",
+            ]
+        ]
+
     def _generate_projection_recommendations(
         self, df: pd.DataFrame, target_year: int
     ) -> str:
@@ -394,39 +432,40 @@ class PredictiveService:
             f"📈 Analyse des projections - Département {df['code_departement'].iloc[0]} :"
         ]
 
-        # Analyse des tendances par type de crime
-        for type_crime in df["type_crime"].unique():
-            crime_data = df[df["type_crime"] == type_crime]
-            last_historic = crime_data[crime_data["data_type"] == "HISTORIQUE"].iloc[-1]
-
-            # Obtention des données pour l'année cible
-            target_projection = crime_data[
-                (crime_data["data_type"] == "PROJECTION")
-                & (crime_data["annee"] == target_year)
-            ].iloc[0]
-
-            variation = (
-                (target_projection["projection"] - last_historic["projection"])
-                / last_historic["projection"]
-                * 100
-            )
+        # Dernière valeur historique et projection cible, une ligne par type de crime
+        last_historic = (
+            df[df["data_type"] == "HISTORIQUE"]
+            .groupby("type_crime", sort=False)
+            .tail(1)
+            .set_index("type_crime")["projection"]
+        )
+        targets = (
+            df[(df["data_type"] == "PROJECTION") & (df["annee"] == target_year)]
+            .drop_duplicates("type_crime")
+            .set_index("type_crime")
+        )
+        targets = targets.join(last_historic.rename("derniere_valeur"), how="inner")
+        targets["variation"] = (
+            (targets["projection"] - targets["derniere_valeur"])
+            / targets["derniere_valeur"]
+            * 100
+        )
 
-            recommendations.append(f"\n{type_crime}:")
-            recommendations.append(
-                f"- Projection 20{target_year}: {target_projection['projection']:.1f}‰ "
-                f"({variation:+.1f}% vs. dernière valeur historique)"
-            )
+        # Analyse des tendances par type de crime
+        for row in targets.reset_index().itertuples(index=False):
+            variation = row.variation
 
-            # Ajout de l'intervalle de confiance
+            # Projection et intervalle de confiance
             recommendations.append(
-                f"- Intervalle de confiance: [{target_projection['lower_bound']:.1f} - "
-                f"{target_projection['upper_bound']:.1f}]‰"
+                _PROJECTION_TEMPLATE.format_map(
+                    dict(row._asdict(), target_year=target_year)
+                )
             )
 
             # Évaluation de la fiabilité basée sur R²
-            if target_projection["r_squared"] > 0.7:
+            if row.r_squared > 0.7:
                 recommendations.append("- ✅ Prédiction fiable (R² > 0.7)")
-            elif target_projection["r_squared"] > 0.5:
+            elif row.r_squared > 0.5:
                 recommendations.append("- ⚠️ Prédiction moyennement fiable (R² > 0.5)")
             else:
                 recommendations.append("- ❌ Prédiction peu fiable (R² < 0.5)")
@@ -450,38 +489,45 @@ class PredictiveService:
             f"⚠️ Analyse des risques - Département {df['code_departement'].iloc[0]} :"
         ]
 
+        # Colonnes extraites une fois, masques calculés sur les tableaux NumPy
+        tendances = df["tendance"].to_numpy()
+        correlations = np.abs(df["correlation"].to_numpy(dtype=float))
+        dernieres_valeurs = df["derniere_valeur"].to_numpy(dtype=float)
+        variations = df["variation_projetee"].to_numpy(dtype=float)
+
         # Analyse des tendances significatives
-        significant_risks = df[df["tendance"].isin(["FORTE_HAUSSE", "FORTE_BAISSE"])]
+        significant_mask = np.isin(tendances, ["FORTE_HAUSSE", "FORTE_BAISSE"])
+        significant_risks = df.iloc[np.flatnonzero(significant_mask)]
         if not significant_risks.empty:
             recommendations.append("\nTendances significatives :")
-            for _, risk in significant_risks.iterrows():
-                recommendations.append(
-                    f"- {risk['type_crime']}: {risk['tendance']} "
-                    f"(Variation projetée: {risk['variation_projetee']:+.1f}%)"
-                )
+            recommendations.extend(
+                _TREND_TEMPLATE.format_map(risk._asdict())
+                for risk in significant_risks.itertuples(index=False)
+            )
 
         # Analyse des corrélations fortes
-        strong_correlations = df[abs(df["correlation"]) > 0.7]
+        # Chaque paire distincte une seule fois : ni (A, A), ni (B, A) après (A, B)
+        distinct_pairs = (df["type_crime"] < df["type_crime_2"]).to_numpy()
+        strong_mask = (correlations > 0.7) & distinct_pairs
+        strong_correlations = df.iloc[np.flatnonzero(strong_mask)]
         if not strong_correlations.empty:
             recommendations.append("\nCorrélations significatives :")
-            for _, corr in strong_correlations.iterrows():
-                if corr["type_crime"] != corr["correlation"]:
-                    recommendations.append(
-                        f"- {corr['type_crime']} et {corr['correlation']} "
-                        f"évoluent de manière similaire (corr: {abs(corr['correlation']):.2f})"
-                    )
+            recommendations.extend(
+                _CORRELATION_TEMPLATE.format_map(
+                    dict(corr._asdict(), abs_correlation=abs(corr.correlation))
+                )
+                for corr in strong_correlations.itertuples(index=False)
+            )
 
         # Identification des risques prioritaires
-        high_risks = df[
-            (df["variation_projetee"] > 20)
-            & (df["derniere_valeur"] > df["derniere_valeur"].mean())
-        ]
+        mean_derniere_valeur = np.nanmean(dernieres_valeurs)
+        high_mask = (variations > 20) & (dernieres_valeurs > mean_derniere_valeur)
+        high_risks = df.iloc[np.flatnonzero(high_mask)]
         if not high_risks.empty:
             recommendations.append("\nPoints d'attention prioritaires :")
-            for _, risk in high_risks.iterrows():
-                recommendations.append(
-                    f"- {risk['type_crime']}: déjà supérieur à la moyenne et "
-                    f"projection en forte hausse (+{risk['variation_projetee']:.1f}%)"
-                )
+            recommendations.extend(
+                _PRIORITY_TEMPLATE.format_map(risk._asdict())
+                for risk in high_risks.itertuples(index=False)
+            )
 
         return "\n".join(recommendations)
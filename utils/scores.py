@@ -0,0 +1,57 @@
+import numpy as np
+
+# En deçà, l'appel au noyau compilé coûte plus qu'il ne rapporte
+_NUMBA_MIN_ROWS = 1000
+
+
+def _score_summary_loop(scores, extreme):
+    """Moyenne des scores et masque des écarts extrêmes (compilés par numba)"""
+    n = scores.shape[0]
+    mask = np.zeros(n, dtype=np.bool_)
+    total = 0.0
+    count = 0
+    for i in range(n):
+        score = scores[i]
+        # Les valeurs manquantes sont ignorées, comme par pandas
+        if np.isnan(score):
+            continue
+        total += score
+        count += 1
+        mask[i] = abs(score) > extreme
+    mean = total / count if count > 0 else np.nan
+    return mean, mask
+
+
+def _score_summary_numpy(scores, extreme):
+    """Moyenne des scores et masque des écarts extrêmes, via numpy"""
+    finite = ~np.isnan(scores)
+    mean = scores[finite].mean() if finite.any() else np.nan
+    return mean, finite & (np.abs(scores) > extreme)
+
+
+# numba compile la boucle en code natif ; repli sur numpy sinon
+try:
+    from numba import njit
+
+    _score_summary_jit = njit(cache=True, nogil=True)(_score_summary_loop)
+except ImportError:
+    _score_summary_jit = None
+
+
+def score_summary(scores: np.ndarray, extreme: float):
+    """Moyenne d'une série de scores et lignes dont l'écart dépasse `extreme`
+
+    Les petits tableaux restent sur numpy ; à partir d'un millier de lignes,
+    la passe unique compilée par numba évite les tableaux intermédiaires.
+
+    Args:
+        scores (np.ndarray): Scores à résumer, NaN pour une valeur manquante
+        extreme (float): Écart absolu au-delà duquel un score est signalé
+
+    Returns:
+        Tuple[float, np.ndarray]: Moyenne des scores et masque des extrêmes
+    """
+    scores = np.ascontiguousarray(scores, dtype=np.float64)
+    if _score_summary_jit is not None and scores.shape[0] >= _NUMBA_MIN_ROWS:
+        return _score_summary_jit(scores, float(extreme))
+    return _score_summary_numpy(scores, extreme)
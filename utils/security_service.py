@@ -1,20 +1,193 @@
 import logging
-from typing import Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Tuple
 
 import gradio as gr
+import numpy as np
 import pandas as pd
-import plotly.graph_objects as go
 
 from database.database import DatabaseConnection
+from utils.cache import ResultCache
+from utils.scores import score_summary
 from view.security_view import SecurityVisualization
 
 logger = logging.getLogger(__name__)
 
+# Historique lu pour l'analyse commerciale, en années jusqu'à l'année demandée
+_BUSINESS_HISTORY = 5
+
+# Types compacts des colonnes entières des résultats : les années tiennent
+# sur 16 bits, les nombres de faits départementaux sur 32 bits
+_COUNT_DTYPES = {"annee": "int16", "nombre_faits": "int32"}
+
+# Emplacements vides des quatre graphiques ; un tuple immuable, copié en
+# liste par chaque visualisation, évite qu'un graphique ne fuie d'un appel à l'autre
+_EMPTY_PLOTS = (None, None, None, None)
+
+# Modalités des classifications du transport, de la plus forte à la plus faible
+_TRANSPORT_TENDANCES = [
+    "FORTE HAUSSE",
+    "HAUSSE",
+    "VARIATION MODÉRÉE",
+    "STABLE",
+    "BAISSE",
+    "FORTE BAISSE",
+]
+_TRANSPORT_NIVEAUX = [
+    "RISQUE TRÈS ÉLEVÉ",
+    "RISQUE ÉLEVÉ",
+    "RISQUE MODÉRÉ",
+    "RISQUE FAIBLE",
+    "RISQUE TRÈS FAIBLE",
+]
+
+# Niveaux des autres services, stockés en catégories plutôt qu'en chaînes
+_ALERT_NIVEAUX = ["ALERTE ROUGE", "ALERTE ORANGE", "VIGILANCE", "NORMAL"]
+_REAL_ESTATE_NIVEAUX = pd.CategoricalDtype(["ÉLEVÉ", "MODÉRÉ", "FAIBLE"])
+_BUSINESS_NIVEAUX = pd.CategoricalDtype(["CRITIQUE", "ÉLEVÉ", "MODÉRÉ"])
+
+# Conseils immobiliers par niveau de risque global
+_REAL_ESTATE_ADVICE = {
+    "ÉLEVÉ": (
+        "⚠️ Zone nécessitant des mesures de sécurité renforcées :",
+        "• Installation de systèmes de sécurité avancés recommandée",
+        "• Coordination avec le voisinage et les forces de l'ordre conseillée",
+        "• Audit de sécurité détaillé avant acquisition",
+        "• Souscription à une assurance renforcée à envisager",
+    ),
+    "MODÉRÉ": (
+        "⚠️ Vigilance recommandée :",
+        "• Mesures de sécurité standards conseillées",
+        "• Participation aux initiatives de voisinage vigilant",
+        "• Vérification régulière des équipements de sécurité",
+    ),
+    "FAIBLE": (
+        "✅ Zone sécurisée :",
+        "• Maintien des mesures de sécurité basiques",
+        "• Surveillance collaborative du voisinage",
+        "• Possibilité de réduction sur les assurances",
+    ),
+}
+
+# Conseils des alertes de voisinage, ajoutés tels quels aux recommandations
+_ALERT_ADVICE = {
+    "ALERTE ROUGE": (
+        "  • Éviter les zones isolées",
+        "  • Renforcer la vigilance collective",
+        "  • Signaler toute activité suspecte",
+        "  • Contact régulier avec les forces de l'ordre",
+    ),
+    "ALERTE ORANGE": (
+        "  • Vigilance accrue recommandée",
+        "  • Coordination avec le voisinage",
+        "  • Vérification des dispositifs de sécurité",
+    ),
+}
+_ALERT_ADVICE_NONE = (
+    "✅ Aucune alerte majeure active",
+    "• Maintien de la vigilance normale",
+    "• Poursuite des bonnes pratiques de sécurité",
+)
+
+# Gabarits des lignes d'alerte active et de tendance significative
+_ALERT_TEMPLATE = (
+    "- {type_crime}: {niveau_alerte} "
+    "(Intensité: {z_score:.1f}σ, Taux: {taux_pour_mille:.1f}‰)"
+)
+_TREND_TEMPLATE = (
+    "- {icon} {type_crime}: {evolution:+.1f}% d'évolution "
+    "(Taux actuel: {taux:.1f}‰, Précédent: {taux_precedent:.1f}‰)"
+)
+
+# Niveau de risque et conseils assurantiels, indexés par quintile (1 à 5)
+_QUINTILE_LABELS = (None, "TRÈS FAIBLE", "FAIBLE", "MOYEN", "ÉLEVÉ", "TRÈS ÉLEVÉ")
+_INSURANCE_ADVICE_LOW = (
+    "  • Eligible aux réductions de prime\n  • Offres packagées possibles"
+)
+_INSURANCE_ADVICE_MEDIUM = (
+    "  • Primes standards avec options de réduction"
+    "\n  • Mesures de prévention basiques conseillées"
+)
+_INSURANCE_ADVICE_HIGH = (
+    "  • Majoration recommandée des primes"
+    "\n  • Audit de sécurité conseillé"
+    "\n  • Clauses de prévention à renforcer"
+)
+_QUINTILE_ADVICE = (
+    None,
+    _INSURANCE_ADVICE_LOW,
+    _INSURANCE_ADVICE_LOW,
+    _INSURANCE_ADVICE_MEDIUM,
+    _INSURANCE_ADVICE_HIGH,
+    _INSURANCE_ADVICE_HIGH,
+)
+
+# Conseils de sécurité commerciale ajoutés après chaque crime, par niveau
+_BUSINESS_ADVICE = {
+    "CRITIQUE": (
+        "  • Installation recommandée de système de sécurité avancé"
+        "\n  • Coordination conseillée avec les services de police"
+        "\n  • Formation du personnel aux situations à risque"
+    ),
+    "ÉLEVÉ": (
+        "  • Renforcement de la surveillance pendant les heures à risque"
+        "\n  • Mise en place de procédures de sécurité standard"
+    ),
+}
+
+
+def _signed_scores(scores: pd.Series) -> pd.Series:
+    """Scores formatés à une décimale, précédés de « + » s'ils sont positifs"""
+    values = scores.to_numpy(dtype=float)
+    return pd.Series(
+        np.char.add(np.where(values > 0, "+", ""), np.char.mod("%.1f", values)),
+        index=scores.index,
+    )
+
 
 class SecurityService:
     def __init__(self):
         self.db = DatabaseConnection()
         self.visualizer = SecurityVisualization()
+        # Message 2016 statique : figure et Plot construits une seule fois
+        self._history_notice = gr.Plot(
+            self.visualizer.create_insufficient_history_notice()
+        )
+        # Un même résultat est réutilisé au plus cinq minutes
+        self.cache = ResultCache(maxsize=256, ttl=300)
+        # Service -> (analyse, sélection de ses paramètres parmi le département,
+        # l'année et le département d'arrivée) ; les paramètres retenus forment
+        # aussi la clé de cache, un champ ignoré par l'analyse n'en fait pas partie
+        self._data_handlers: Dict[str, Tuple[Callable, Callable]] = {
+            "TransportSécurité": (
+                self._transport_security,
+                lambda dept, year, dest: (dept, dest),
+            ),
+            "Sécurité Immobilière": (
+                self._real_estate_security,
+                lambda dept, year, dest: (dept, year),
+            ),
+            "AlerteVoisinage": (
+                self._neighborhood_alert,
+                lambda dept, year, dest: (dept, year),
+            ),
+            "BusinessSecurity": (
+                self._business_security,
+                lambda dept, year, dest: (dept, year),
+            ),
+            "OptimisationAssurance": (
+                self._insurance_optimization,
+                lambda dept, year, dest: (dept, year),
+            ),
+        }
+        # Service -> visualisations, appelées avec (df, année complète)
+        self._plot_handlers: Dict[str, Callable] = {
+            "TransportSécurité": self._plot_transport,
+            "Sécurité Immobilière": self._plot_real_estate,
+            "AlerteVoisinage": self._plot_alert,
+            "BusinessSecurity": self._plot_business,
+            "OptimisationAssurance": self._plot_insurance,
+        }
 
     def process_request(
         self,
@@ -26,205 +199,112 @@ class SecurityService:
         radius: int = None,
     ) -> Tuple[pd.DataFrame, str, gr.Plot, gr.Plot, gr.Plot, gr.Plot]:
         try:
-            empty_plots = [None] * 4
-
             # Convertir l'année en format complet
             full_year = 2000 + year if year < 100 else year
-            logger.info(f"Année convertie : {year} -> {full_year}")
+            logger.info("Année convertie : %s -> %s", year, full_year)
 
-            # Obtenir les données et recommandations
+            # Obtenir les données et recommandations, depuis le cache si possible
             df, recommendations = self._get_service_data(
                 service, department, year, department_dest, crime_type, radius
             )
-            if df.empty:
-                return (df, "Aucune donnée disponible", *empty_plots)
-
-            try:
-                if service == "TransportSécurité":
-                    plots = empty_plots
-
-                    # Création du radar des risques
-                    risk_radar = self.visualizer.create_transport_risk_radar(df)
-                    if risk_radar is not None:
-                        plots[0] = gr.Plot(risk_radar)
-
-                    # Création de la timeline des incidents
-                    timeline = self.visualizer.create_transport_timeline(df)
-                    if timeline is not None:
-                        plots[1] = gr.Plot(timeline)
-
-                    return (df, recommendations, *plots)
-                if service == "OptimisationAssurance":
-                    try:
-                        # Récupération des données
-                        df, recommendations = self._insurance_optimization(
-                            department, year
-                        )
-                        if df.empty:
-                            return df, "Aucune donnée disponible", *empty_plots
-
-                        # Initialisation des visualisations
-                        plots = empty_plots
-
-                        # Création de la heatmap de risque
-                        risk_heatmap = self.visualizer.create_insurance_risk_heatmap(df)
-                        if risk_heatmap:
-                            plots[0] = gr.Plot(risk_heatmap)
-
-                        # Création du scoring territorial
-                        scoring_plot = self.visualizer.create_insurance_scoring(df)
-                        if scoring_plot:
-                            plots[1] = gr.Plot(scoring_plot)
-
-                        return df, recommendations, *plots
-
-                    except Exception as e:
-                        logger.error(
-                            f"Erreur lors du traitement OptimisationAssurance: {e}"
-                        )
-                        logger.exception("Détails de l'erreur:")
-                        return pd.DataFrame(), f"Erreur: {str(e)}", *empty_plots
-
-                if service == "BusinessSecurity":
-                    plots = empty_plots
-
-                    # Création de la heatmap d'impact business
-                    impact_fig = self.visualizer.create_business_impact_heatmap(df)
-                    if impact_fig is not None:
-                        plots[0] = gr.Plot(impact_fig)
-
-                    # Création de l'évaluation des zones
-                    zone_fig = self.visualizer.create_business_zone_assessment(df)
-                    if zone_fig is not None:
-                        plots[1] = gr.Plot(zone_fig)
-
-                    return (df, recommendations, *plots)
-                if service == "AlerteVoisinage":
-                    plots = empty_plots
-
-                    # Debug
-                    logger.info(f"Données reçues: \n{df.head()}")
-
-                    fig = None
-                    if full_year == 2016:
-                        logger.info("Création du message pour 2016")
-                        fig = go.Figure()
-
-                        # Ajout d'un rectangle de fond pour mieux voir le message
-                        fig.add_shape(
-                            type="rect",
-                            x0=0,
-                            y0=0,
-                            x1=1,
-                            y1=1,
-                            xref="paper",
-                            yref="paper",
-                            fillcolor="white",
-                            line_width=0,
-                        )
-
-                        # Icône d'information
-                        fig.add_annotation(
-                            text="ℹ️",
-                            xref="paper",
-                            yref="paper",
-                            x=0.5,
-                            y=1.25,
-                            showarrow=False,
-                            font=dict(size=40),
-                            align="center",
-                        )
-
-                        # Titre
-                        fig.add_annotation(
-                            text="Données historiques insuffisantes",
-                            xref="paper",
-                            yref="paper",
-                            x=0.5,
-                            y=1,
-                            showarrow=False,
-                            font=dict(size=24, color="darkblue", family="Arial Black"),
-                            align="center",
-                        )
-
-                        # Message explicatif
-                        fig.add_annotation(
-                            text=(
-                                "2016 est la première année de nos données.<br>"
-                                + "Le calcul du niveau d'alerte nécessite un historique<br>"
-                                + "d'au moins 2 ans pour être pertinent.<br><br>"
-                                + "👉 Consultez les années ultérieures pour<br>"
-                                + "voir l'évolution des alertes."
-                            ),
-                            xref="paper",
-                            yref="paper",
-                            x=0.5,
-                            y=0.4,
-                            showarrow=False,
-                            font=dict(size=16, color="gray"),
-                            align="center",
-                        )
-
-                        fig.update_layout(
-                            showlegend=False,
-                            height=300,
-                            paper_bgcolor="white",
-                            plot_bgcolor="white",
-                            margin=dict(t=50, b=50, l=50, r=50),
-                            xaxis={
-                                "showgrid": False,
-                                "showticklabels": False,
-                                "zeroline": False,
-                            },
-                            yaxis={
-                                "showgrid": False,
-                                "showticklabels": False,
-                                "zeroline": False,
-                            },
-                        )
-                        logger.info("Message 2016 créé avec succès")
-                    else:
-                        logger.info("Création de la jauge standard")
-                        fig = self.visualizer.create_alert_gauge(df)
-
-                    # Si on a une figure, on la convertit en Plot
-                    if fig is not None:
-                        logger.info("Conversion de la figure en Plot")
-                        plots[0] = gr.Plot(fig)
-                    else:
-                        logger.warning("Aucune figure créée")
-                        plots[0] = gr.Plot()  # Plot vide plutôt que None
-
-                    # Création de la heatmap
-                    alert_heatmap = self.visualizer.create_alert_heatmap(df)
-                    if alert_heatmap is not None:
-                        plots[1] = gr.Plot(alert_heatmap)
-                    else:
-                        plots[1] = gr.Plot()  # Plot vide plutôt que None
-
-                    return (df, recommendations, *plots)
-
-                elif service == "Sécurité Immobilière":
-                    figures = self.visualizer.generate_security_visualizations(df)
-                    plots = [
-                        gr.Plot(fig) if fig else gr.Plot()
-                        for fig in (figures + empty_plots)[:4]
-                    ]
-                    return (df, recommendations, *plots)
-
-                return (df, recommendations, *empty_plots)
-
-            except Exception as viz_error:
-                logger.error(
-                    f"Erreur lors de la génération des visualisations: {viz_error}"
-                )
-                logger.exception("Détails de l'erreur:")
-                return (df, recommendations, *empty_plots)
-
         except Exception as e:
-            logger.error(f"Erreur dans process_request: {str(e)}")
+            logger.error("Erreur dans process_request: %s", e)
             logger.exception("Détails de l'erreur:")
-            return (pd.DataFrame(), f"Erreur: {str(e)}", *empty_plots)
+            return (pd.DataFrame(), f"Erreur: {str(e)}", *_EMPTY_PLOTS)
+
+        if df.empty:
+            return (df, "Aucune donnée disponible", *_EMPTY_PLOTS)
+
+        handler = self._plot_handlers.get(service)
+        if handler is None:
+            return (df, recommendations, *_EMPTY_PLOTS)
+
+        # Une erreur de visualisation laisse les données et recommandations
+        try:
+            plots = handler(df, full_year)
+        except Exception as viz_error:
+            logger.error(
+                "Erreur lors de la génération des visualisations: %s", viz_error
+            )
+            logger.exception("Détails de l'erreur:")
+            return (df, recommendations, *_EMPTY_PLOTS)
+        return (df, recommendations, *plots)
+
+    def _build_figures(self, df: pd.DataFrame, *builders: Callable) -> List:
+        """Construit en parallèle des figures indépendantes à partir du même df"""
+        with ThreadPoolExecutor(max_workers=len(builders)) as executor:
+            futures = [executor.submit(build, df) for build in builders]
+            return [future.result() for future in futures]
+
+    def _plot_pair(self, df: pd.DataFrame, *builders: Callable) -> List:
+        """Deux figures construites en parallèle, les emplacements restants vides"""
+        plots = list(_EMPTY_PLOTS)
+        for i, fig in enumerate(self._build_figures(df, *builders)):
+            if fig is not None:
+                plots[i] = gr.Plot(fig)
+        return plots
+
+    def _plot_transport(self, df: pd.DataFrame, full_year: int) -> List:
+        """Radar des risques et timeline des incidents"""
+        return self._plot_pair(
+            df,
+            self.visualizer.create_transport_risk_radar,
+            self.visualizer.create_transport_timeline,
+        )
+
+    def _plot_insurance(self, df: pd.DataFrame, full_year: int) -> List:
+        """Heatmap de risque et scoring territorial"""
+        return self._plot_pair(
+            df,
+            self.visualizer.create_insurance_risk_heatmap,
+            self.visualizer.create_insurance_scoring,
+        )
+
+    def _plot_business(self, df: pd.DataFrame, full_year: int) -> List:
+        """Heatmap d'impact business et évaluation des zones"""
+        return self._plot_pair(
+            df,
+            self.visualizer.create_business_impact_heatmap,
+            self.visualizer.create_business_zone_assessment,
+        )
+
+    def _plot_alert(self, df: pd.DataFrame, full_year: int) -> List:
+        """Jauge d'alerte (ou message 2016) et heatmap des alertes"""
+        plots = list(_EMPTY_PLOTS)
+
+        if full_year == 2016:
+            # Message statique, construit et encapsulé à l'initialisation
+            plots[0] = self._history_notice
+            alert_heatmap = self.visualizer.create_alert_heatmap(df)
+        else:
+            logger.info("Création de la jauge standard")
+            fig, alert_heatmap = self._build_figures(
+                df,
+                self.visualizer.create_alert_gauge,
+                self.visualizer.create_alert_heatmap,
+            )
+
+            # Si on a une figure, on la convertit en Plot
+            if fig is not None:
+                logger.info("Conversion de la figure en Plot")
+                plots[0] = gr.Plot(fig)
+            else:
+                logger.warning("Aucune figure créée")
+                plots[0] = gr.Plot()  # Plot vide plutôt que None
+
+        if alert_heatmap is not None:
+            plots[1] = gr.Plot(alert_heatmap)
+        else:
+            plots[1] = gr.Plot()  # Plot vide plutôt que None
+        return plots
+
+    def _plot_real_estate(self, df: pd.DataFrame, full_year: int) -> List:
+        """Jusqu'à quatre visualisations de sécurité immobilière"""
+        figures = self.visualizer.generate_security_visualizations(df)
+        return [
+            gr.Plot(fig) if fig else gr.Plot()
+            for fig in [*figures, *_EMPTY_PLOTS][:4]
+        ]
 
     def _get_service_data(
         self,
@@ -237,26 +317,16 @@ class SecurityService:
     ) -> Tuple[pd.DataFrame, str]:
         """Get the service specific data"""
         try:
-            logger.info(f"Exécution de _get_service_data pour {service}")
-            if service == "TransportSécurité":
-                return self._transport_security(department, department_dest)
-            elif service == "Sécurité Immobilière":
-                logger.info(
-                    f"Exécution de _real_estate_security pour dept={department}"
-                )
-                return self._real_estate_security(department, year)
-            elif service == "AlerteVoisinage":
-                return self._neighborhood_alert(department, year, radius)
-            elif service == "BusinessSecurity":
-                # Pour BusinessSecurity, on ignore les paramètres supplémentaires
-                return self._business_security(department, year)
-            elif service == "OptimisationAssurance":
-                return self._insurance_optimization(department, year)
-            else:
-                logger.warning(f"Service non reconnu: {service}")
+            logger.info("Exécution de _get_service_data pour %s", service)
+            handler = self._data_handlers.get(service)
+            if handler is None:
+                logger.warning("Service non reconnu: %s", service)
                 return pd.DataFrame(), "Service non reconnu"
+            analysis, select_params = handler
+            params = select_params(department, year, department_dest)
+            return self.cache.get_or_compute((service, *params), analysis, *params)
         except Exception as e:
-            logger.error(f"Erreur dans _get_service_data: {str(e)}")
+            logger.error("Erreur dans _get_service_data: %s", e)
             logger.exception("Détails de l'erreur:")
             return pd.DataFrame(), f"Erreur: {str(e)}"
 
@@ -266,33 +336,31 @@ class SecurityService:
         """Analyse les métriques de sécurité immobilière"""
         query = """
         WITH 
-        -- Statistiques mensuelles nationales
+        -- Statistiques mensuelles nationales, limitées à l'année analysée :
+        -- seule celle-ci est jointe, inutile d'agréger tout l'historique
         NationalStats AS (
             SELECT 
-                c.type_crime,
-                c.annee,
-                SUM(c.nombre_faits) as total_faits_national,
-                SUM(d.population) as total_population_national,
-                CAST(SUM(c.nombre_faits) * 1000.0 AS DECIMAL(10,2)) / NULLIF(SUM(d.population), 0) as taux_national
-            FROM crimes c
-            JOIN statistiques s ON c.id_crime = s.id_crime
-            JOIN departements d ON s.code_departement = d.code_departement
-            GROUP BY c.type_crime, c.annee
+                sd.type_crime,
+                sd.annee,
+                SUM(sd.nombre_faits) as total_faits_national,
+                SUM(sd.population) as total_population_national,
+                CAST(SUM(sd.nombre_faits) * 1000.0 AS DECIMAL(10,2)) / NULLIF(SUM(sd.population), 0) as taux_national
+            FROM stats_departementales sd
+            WHERE sd.annee = %s
+            GROUP BY sd.type_crime, sd.annee
         ),
         -- Statistiques mensuelles du département
         DepartmentStats AS (
             SELECT 
-                d.code_departement,
-                c.type_crime,
-                c.annee,
-                c.nombre_faits,
-                d.population,
-                CAST(c.nombre_faits * 1000.0 AS DECIMAL(10,2)) / NULLIF(d.population, 0) as taux_dept
-            FROM crimes c
-            JOIN statistiques s ON c.id_crime = s.id_crime
-            JOIN departements d ON s.code_departement = d.code_departement
-            WHERE d.code_departement = %s
-            AND c.annee = %s
+                sd.code_departement,
+                sd.type_crime,
+                sd.annee,
+                sd.nombre_faits,
+                sd.population,
+                CAST(sd.nombre_faits * 1000.0 AS DECIMAL(10,2)) / NULLIF(sd.population, 0) as taux_dept
+            FROM stats_departementales sd
+            WHERE sd.code_departement = %s
+            AND sd.annee = %s
         ),
         -- Score de sécurité relatif
         SecurityScore AS (
@@ -328,102 +396,43 @@ class SecurityService:
         """
 
         try:
-            df = self.db.execute_query(query, (department, year))
-            logger.info(f"Données récupérées: {len(df)} lignes")
+            df = self.db.execute_query(query, (year, department, year)).astype(
+                {"niveau_risque": _REAL_ESTATE_NIVEAUX}
+            )
+            logger.info("Données récupérées: %d lignes", len(df))
             recommendations = self._generate_real_estate_recommendations(df)
             return df, recommendations
         except Exception as e:
-            logger.error(f"Erreur lors de l'analyse immobilière: {str(e)}")
+            logger.error("Erreur lors de l'analyse immobilière: %s", e)
             return pd.DataFrame(), "Erreur lors de l'analyse des données immobilières"
 
     def _neighborhood_alert(
         self, department: str, year: int, radius: int = None
     ) -> Tuple[pd.DataFrame, str]:
         """Generate neighborhood alerts and risk analysis"""
+        # Statistiques glissantes précalculées : seule l'année demandée est lue,
+        # le z-score et le niveau d'alerte sont calculés en Python
         query = """
-        WITH TemporalTrends AS (
-            SELECT 
-                d.code_departement,
-                c.type_crime,
-                c.annee,
-                c.nombre_faits,
-                s.taux_pour_mille,
-                COALESCE(
-                    AVG(s.taux_pour_mille) OVER (
-                        PARTITION BY d.code_departement, c.type_crime
-                        ORDER BY c.annee
-                        ROWS BETWEEN 2 PRECEDING AND CURRENT ROW
-                    ),
-                    s.taux_pour_mille
-                ) as moyenne_mobile,
-                COALESCE(
-                    STDDEV(s.taux_pour_mille) OVER (
-                        PARTITION BY d.code_departement, c.type_crime
-                        ORDER BY c.annee
-                        ROWS BETWEEN 2 PRECEDING AND CURRENT ROW
-                    ),
-                    CASE 
-                        WHEN c.annee <= 2018 THEN s.taux_pour_mille * 0.1
-                        ELSE NULLIF(ABS(s.taux_pour_mille - LAG(s.taux_pour_mille) OVER (
-                            PARTITION BY d.code_departement, c.type_crime 
-                            ORDER BY c.annee
-                        )), 0)
-                    END
-                ) as ecart_type
-            FROM crimes c
-            JOIN statistiques s ON c.id_crime = s.id_crime
-            JOIN departements d ON s.code_departement = d.code_departement
-            WHERE d.code_departement = %s
-        ),
-        RiskAssessment AS (
-            SELECT 
-                code_departement,
-                type_crime,
-                annee,
-                nombre_faits,
-                taux_pour_mille,
-                moyenne_mobile,
-                ecart_type,
-                CASE 
-                    WHEN ecart_type = 0 THEN 0
-                    ELSE (taux_pour_mille - moyenne_mobile) / NULLIF(ecart_type, 0)
-                END as z_score
-            FROM TemporalTrends
-            WHERE annee = %s
-        )
         SELECT 
-            *,
-            CASE 
-                WHEN z_score > 2 THEN 'ALERTE ROUGE'
-                WHEN z_score > 1 THEN 'ALERTE ORANGE'
-                WHEN z_score > 0 THEN 'VIGILANCE'
-                ELSE 'NORMAL'
-            END as niveau_alerte,
-            LAG(taux_pour_mille) OVER (
-                PARTITION BY code_departement, type_crime 
-                ORDER BY annee
-            ) as taux_precedent,
-            CASE 
-                WHEN LAG(taux_pour_mille) OVER (
-                    PARTITION BY code_departement, type_crime 
-                    ORDER BY annee
-                ) = 0 THEN 0
-                ELSE ((taux_pour_mille - LAG(taux_pour_mille) OVER (
-                    PARTITION BY code_departement, type_crime 
-                    ORDER BY annee
-                )) / NULLIF(LAG(taux_pour_mille) OVER (
-                    PARTITION BY code_departement, type_crime 
-                    ORDER BY annee
-                ), 0) * 100)
-            END as evolution_pourcentage
-        FROM RiskAssessment
-        ORDER BY z_score DESC;
+            tt.code_departement,
+            tt.type_crime,
+            tt.annee,
+            tt.nombre_faits,
+            tt.taux_pour_mille,
+            tt.moyenne_mobile,
+            tt.ecart_type,
+            tt.taux_precedent
+        FROM tendances_temporelles tt
+        WHERE tt.code_departement = %s
+        AND tt.annee = %s;
         """
 
         try:
-            df = self.db.execute_query(query, (department, year))
-            logger.info(f"Données récupérées pour alerte voisinage: {len(df)} lignes")
-            logger.debug(f"Échantillon des données: \n{df.head()}")
+            params = (department, int(year))
+            trends = self.db.execute_query(query, params, prepared=True)
+            df = self._compute_alerts(trends)
+            logger.info("Données récupérées pour alerte voisinage: %d lignes", len(df))
+            logger.debug("Échantillon des données: \n%s", df.head())
 
             if df.empty:
                 return df, "Aucune donnée disponible pour cette période"
@@ -432,67 +441,133 @@ class SecurityService:
             return df, recommendations
 
         except Exception as e:
-            logger.error(f"Erreur dans _neighborhood_alert: {str(e)}")
+            logger.error("Erreur dans _neighborhood_alert: %s", e)
             logger.exception("Détails de l'erreur:")
             return pd.DataFrame(), f"Erreur lors de l'analyse : {str(e)}"
 
+    def _compute_alerts(self, trends: pd.DataFrame) -> pd.DataFrame:
+        """Calcule z-score, niveau d'alerte et évolution à partir des tendances"""
+        if trends.empty:
+            return trends
+
+        rates = trends["taux_pour_mille"].to_numpy(dtype=float)
+        moyenne_mobile = trends["moyenne_mobile"].to_numpy(dtype=float)
+        ecart_type = trends["ecart_type"].to_numpy(dtype=float)
+        taux_precedent = trends["taux_precedent"].to_numpy(dtype=float)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            z_score = np.where(
+                ecart_type == 0, 0.0, (rates - moyenne_mobile) / ecart_type
+            )
+            evolution = np.where(
+                taux_precedent == 0,
+                0.0,
+                (rates - taux_precedent) / taux_precedent * 100,
+            )
+
+        # Ordre des colonnes affichées : taux_precedent suit le niveau d'alerte
+        df = trends.drop(columns="taux_precedent").assign(
+            z_score=z_score,
+            niveau_alerte=pd.Categorical.from_codes(
+                np.select(
+                    [z_score > 2, z_score > 1, z_score > 0], [0, 1, 2], default=3
+                ),
+                _ALERT_NIVEAUX,
+            ),
+            taux_precedent=taux_precedent,
+            evolution_pourcentage=evolution,
+        )
+        df = df.astype(_COUNT_DTYPES)
+        df = df.sort_values(["z_score", "type_crime"], ascending=[False, True])
+        return df.reset_index(drop=True)
+
     def _business_security(
         self, department: str, year: int = None
     ) -> Tuple[pd.DataFrame, str]:
         """Analyze business security risks with historical context"""
-        logger.info(f"Exécution de business_security pour dept={department}")
+        logger.info("Exécution de business_security pour dept=%s", department)
 
         query = """
         WITH 
         -- Statistiques nationales
         NationalStats AS (
             SELECT 
-                c.type_crime,
-                c.annee,
-                SUM(c.nombre_faits) as total_faits_national,
-                SUM(d.population) as total_population_national,
-                CAST(SUM(c.nombre_faits) * 1000.0 / NULLIF(SUM(d.population), 0) AS DECIMAL(10,2)) as taux_national
-            FROM crimes c
-            JOIN statistiques s ON c.id_crime = s.id_crime
-            JOIN departements d ON s.code_departement = d.code_departement
-            GROUP BY c.type_crime, c.annee
+                sd.type_crime,
+                sd.annee,
+                SUM(sd.nombre_faits) as total_faits_national,
+                SUM(sd.population) as total_population_national,
+                CAST(SUM(sd.nombre_faits) * 1000.0 / NULLIF(SUM(sd.population), 0) AS DECIMAL(10,2)) as taux_national
+            FROM stats_departementales sd
+            WHERE sd.annee >= %s
+            GROUP BY sd.type_crime, sd.annee
         ),
         -- Statistiques départementales
         DepartmentStats AS (
             SELECT 
-                d.code_departement,
-                d.population,
-                d.logements,
-                c.type_crime,
-                c.annee,
-                c.nombre_faits,
-                CAST(c.nombre_faits * 1000.0 / NULLIF(d.population, 0) AS DECIMAL(10,2)) as taux_dept
-            FROM crimes c
-            JOIN statistiques s ON c.id_crime = s.id_crime
-            JOIN departements d ON s.code_departement = d.code_departement
-            WHERE d.code_departement = %s
+                sd.code_departement,
+                sd.population,
+                sd.logements,
+                sd.type_crime,
+                sd.annee,
+                sd.nombre_faits,
+                CAST(sd.nombre_faits * 1000.0 / NULLIF(sd.population, 0) AS DECIMAL(10,2)) as taux_dept
+            FROM stats_departementales sd
+            WHERE sd.code_departement = %s
+            AND sd.annee >= %s
+        ),
+        -- Classification des risques par crime et par année
+        BusinessRisks AS (
+            SELECT 
+                ds.*,
+                ns.taux_national,
+                -- Calcul de l'écart avec la moyenne nationale
+                CAST(((ds.taux_dept - ns.taux_national) / NULLIF(ns.taux_national, 0)) * 100 AS DECIMAL(10,2)) as variation_nationale,
+                -- Classification du risque
+                CASE 
+                    WHEN ds.taux_dept > (ns.taux_national * 1.5) THEN 'CRITIQUE'
+                    WHEN ds.taux_dept > (ns.taux_national * 1.2) THEN 'ÉLEVÉ'
+                    ELSE 'MODÉRÉ'
+                END as niveau_risque,
+                MAX(ds.annee) OVER () as derniere_annee
+            FROM DepartmentStats ds
+            JOIN NationalStats ns ON ds.type_crime = ns.type_crime 
+                AND ds.annee = ns.annee
         )
         SELECT 
-            ds.*,
-            ns.taux_national,
-            -- Calcul de l'écart avec la moyenne nationale
-            CAST(((ds.taux_dept - ns.taux_national) / NULLIF(ns.taux_national, 0)) * 100 AS DECIMAL(10,2)) as variation_nationale,
-            -- Classification du risque
-            CASE 
-                WHEN ds.taux_dept > (ns.taux_national * 1.5) THEN 'CRITIQUE'
-                WHEN ds.taux_dept > (ns.taux_national * 1.2) THEN 'ÉLEVÉ'
-                ELSE 'MODÉRÉ'
-            END as niveau_risque
-        FROM DepartmentStats ds
-        JOIN NationalStats ns ON ds.type_crime = ns.type_crime 
-            AND ds.annee = ns.annee
-        ORDER BY ds.annee DESC, ds.taux_dept DESC;
+            code_departement,
+            population,
+            logements,
+            type_crime,
+            annee,
+            nombre_faits,
+            taux_dept,
+            taux_national,
+            variation_nationale,
+            niveau_risque,
+            -- Risque commercial de la dernière année seulement, déjà classé :
+            -- les recommandations n'ont plus qu'à regrouper ces lignes
+            CASE WHEN annee = derniere_annee THEN
+                CAST(nombre_faits * 10000.0 / NULLIF(population, 0) AS DECIMAL(10,2))
+            END as risque_commercial,
+            CASE WHEN annee = derniere_annee THEN niveau_risque
+            END as niveau_risque_commercial
+        FROM BusinessRisks
+        ORDER BY annee DESC, taux_dept DESC;
         """
 
         try:
-            df = self.db.execute_query(query, (department,))
+            # Sans année demandée, tout l'historique est conservé
+            first_year = 0 if year is None else int(year) - _BUSINESS_HISTORY + 1
+            df = self.db.execute_query(
+                query, (first_year, department, first_year)
+            ).astype(
+                {
+                    "niveau_risque": _BUSINESS_NIVEAUX,
+                    "niveau_risque_commercial": _BUSINESS_NIVEAUX,
+                }
+            )
 
-            logger.info(f"Données récupérées: {len(df)} lignes")
+            logger.info("Données récupérées: %d lignes", len(df))
             if df.empty:
                 logger.warning("Aucune donnée trouvée pour les paramètres donnés")
                 return df, "Aucune donnée trouvée pour ces critères"
@@ -500,7 +575,7 @@ class SecurityService:
             recommendations = self._generate_business_recommendations(df)
             return df, recommendations
         except Exception as e:
-            logger.error(f"Erreur dans _business_security: {str(e)}")
+            logger.error("Erreur dans _business_security: %s", e)
             logger.exception("Détails de l'erreur:")
             return pd.DataFrame(), "Erreur lors de l'analyse des données commerciales"
 
@@ -511,17 +586,15 @@ class SecurityService:
         query = """
         WITH RiskMetrics AS (
             SELECT 
-                d.code_departement,
-                c.type_crime,
-                c.nombre_faits,
-                d.population,
-                d.logements,
-                CAST(c.nombre_faits AS DECIMAL(10,4)) / NULLIF(d.logements, 0) as risque_logement,
-                CAST(c.nombre_faits AS DECIMAL(10,4)) / NULLIF(d.population, 0) * 1000 as risque_population
-            FROM crimes c
-            JOIN statistiques s ON c.id_crime = s.id_crime
-            JOIN departements d ON s.code_departement = d.code_departement
-            WHERE d.code_departement = %s AND c.annee = %s
+                sd.code_departement,
+                sd.type_crime,
+                sd.nombre_faits,
+                sd.population,
+                sd.logements,
+                CAST(sd.nombre_faits AS DECIMAL(10,4)) / NULLIF(sd.logements, 0) as risque_logement,
+                CAST(sd.nombre_faits AS DECIMAL(10,4)) / NULLIF(sd.population, 0) * 1000 as risque_population
+            FROM stats_departementales sd
+            WHERE sd.code_departement = %s AND sd.annee = %s
         ),
         InsuranceScore AS (
             SELECT
@@ -535,7 +608,9 @@ class SecurityService:
         SELECT 
             *,
             NTILE(5) OVER (ORDER BY score_assurance) as quintile_risque,
-            ROUND(score_assurance / (SELECT AVG(score_assurance) FROM InsuranceScore) * 100, 2) as indice_relatif
+            ROUND(
+                score_assurance / AVG(score_assurance) OVER () * 100, 2
+            ) as indice_relatif
         FROM InsuranceScore
         ORDER BY score_assurance DESC;
         """
@@ -562,126 +637,36 @@ class SecurityService:
         if not dept_depart or not dept_arrivee:
             return pd.DataFrame(), "Départements de départ et d'arrivée requis"
 
+        # Moyenne mobile, taux précédent et rang sont précalculés dans
+        # tendances_temporelles : seule la dernière année est lue
         query = """
         WITH TransportStats AS (
             SELECT 
-                d.code_departement,
-                c.type_crime,
-                c.annee,
-                c.nombre_faits,
-                s.taux_pour_mille,
+                tt.code_departement,
+                tt.type_crime,
+                tt.annee,
+                tt.nombre_faits,
+                tt.taux_pour_mille,
                 -- Conversion en taux pour 100k habitants
-                s.taux_pour_mille * 100 as taux_100k,
-                -- Moyenne mobile sur 3 ans du taux
-                AVG(s.taux_pour_mille) OVER (
-                    PARTITION BY d.code_departement, c.type_crime
-                    ORDER BY c.annee
-                    ROWS BETWEEN 2 PRECEDING AND CURRENT ROW
-                ) as moyenne_mobile_taux,
-                -- Taux année précédente
-                LAG(s.taux_pour_mille) OVER (
-                    PARTITION BY d.code_departement, c.type_crime
-                    ORDER BY c.annee
-                ) as taux_annee_precedente,
-                -- Rang basé sur le taux
-                RANK() OVER (
-                    PARTITION BY d.code_departement, c.type_crime
-                    ORDER BY s.taux_pour_mille DESC
-                ) as rang_taux
-            FROM crimes c
-            JOIN statistiques s ON c.id_crime = s.id_crime
-            JOIN departements d ON s.code_departement = d.code_departement
-            WHERE d.code_departement IN (%s, %s)
-            AND c.type_crime IN (
-                'Vols avec armes',
-                'Vols violents sans arme',
-                'Vols dans les véhicules',
-                'Vols de véhicules',
-                'Vols d''accessoires sur véhicules',
-                'Destructions et dégradations volontaires'
-            )
+                tt.taux_pour_mille * 100 as taux_100k,
+                tt.moyenne_mobile as moyenne_mobile_taux,
+                tt.taux_precedent as taux_annee_precedente,
+                tt.rang_taux
+            FROM tendances_temporelles tt
+            -- Types de crime retenus, lus dans leur table de référence
+            JOIN types_crime_transport t ON t.type_crime = tt.type_crime
+            WHERE tt.code_departement IN (%s, %s)
         )
-        SELECT 
-            code_departement,
-            type_crime,
-            annee,
-            nombre_faits,
-            taux_pour_mille,
-            taux_100k,
-            CASE 
-                WHEN taux_annee_precedente IS NULL OR taux_annee_precedente = 0 THEN 0
-                ELSE ROUND(((taux_pour_mille - taux_annee_precedente) / 
-                    taux_annee_precedente) * 100, 2)
-            END as evolution_pourcentage,
-            CASE
-                WHEN moyenne_mobile_taux = 0 THEN 0
-                ELSE ROUND(((taux_pour_mille - moyenne_mobile_taux) / moyenne_mobile_taux) * 100, 2)
-            END as evolution_moyenne_mobile,
-            CASE 
-                WHEN taux_annee_precedente IS NULL OR taux_annee_precedente = 0 THEN 'STABLE'
-                WHEN ((taux_pour_mille - taux_annee_precedente) / taux_annee_precedente * 100) > 20 
-                    OR ((taux_pour_mille - moyenne_mobile_taux) / moyenne_mobile_taux * 100) > 15 
-                    THEN 'FORTE HAUSSE'
-                WHEN ((taux_pour_mille - taux_annee_precedente) / taux_annee_precedente * 100) > 10 
-                    OR ((taux_pour_mille - moyenne_mobile_taux) / moyenne_mobile_taux * 100) > 10
-                    THEN 'HAUSSE'
-                WHEN ((taux_pour_mille - taux_annee_precedente) / taux_annee_precedente * 100) < -20 
-                    OR ((taux_pour_mille - moyenne_mobile_taux) / moyenne_mobile_taux * 100) < -15
-                    THEN 'FORTE BAISSE'
-                WHEN ((taux_pour_mille - taux_annee_precedente) / taux_annee_precedente * 100) < -10 
-                    OR ((taux_pour_mille - moyenne_mobile_taux) / moyenne_mobile_taux * 100) < -10
-                    THEN 'BAISSE'
-                WHEN ABS((taux_pour_mille - taux_annee_precedente) / taux_annee_precedente * 100) <= 5 
-                    AND ABS((taux_pour_mille - moyenne_mobile_taux) / moyenne_mobile_taux * 100) <= 7
-                    THEN 'STABLE'
-                ELSE 'VARIATION MODÉRÉE'
-            END as tendance,
-            CASE 
-                WHEN taux_100k > 50 OR 
-                    (taux_100k > 40 AND ((taux_pour_mille - taux_annee_precedente) / 
-                        NULLIF(taux_annee_precedente, 0) * 100) > 15) OR
-                    (rang_taux = 1 AND taux_annee_precedente IS NOT NULL AND
-                        ((taux_pour_mille - taux_annee_precedente) / 
-                        NULLIF(taux_annee_precedente, 0) * 100) > 0)
-                    THEN 'RISQUE TRÈS ÉLEVÉ'
-                WHEN taux_100k > 35 OR 
-                    (taux_100k > 25 AND ((taux_pour_mille - taux_annee_precedente) / 
-                        NULLIF(taux_annee_precedente, 0) * 100) > 10) OR
-                    rang_taux <= 2
-                    THEN 'RISQUE ÉLEVÉ'
-                WHEN taux_100k > 20 OR 
-                    (taux_100k > 15 AND ((taux_pour_mille - taux_annee_precedente) / 
-                        NULLIF(taux_annee_precedente, 0) * 100) > 5)
-                    THEN 'RISQUE MODÉRÉ'
-                WHEN taux_100k > 10
-                    THEN 'RISQUE FAIBLE'
-                ELSE 'RISQUE TRÈS FAIBLE'
-            END as niveau_risque,
-            GREATEST(0, LEAST(100, 
-                100 - (taux_100k * 0.8) - 
-                (CASE 
-                    WHEN taux_annee_precedente IS NOT NULL 
-                    AND ((taux_pour_mille - taux_annee_precedente) / 
-                        NULLIF(taux_annee_precedente, 0) * 100) > 0 
-                    THEN ((taux_pour_mille - taux_annee_precedente) / 
-                        NULLIF(taux_annee_precedente, 0) * 100) * 0.4 
-                    ELSE 0 
-                END) -
-                (CASE 
-                    WHEN moyenne_mobile_taux > 0 
-                    AND ((taux_pour_mille - moyenne_mobile_taux) / moyenne_mobile_taux * 100) > 0 
-                    THEN ((taux_pour_mille - moyenne_mobile_taux) / moyenne_mobile_taux * 100) * 0.3 
-                    ELSE 0 
-                END)
-            )) as score_securite
+        -- Les classifications sont calculées après lecture, en NumPy
+        SELECT *
         FROM TransportStats
-        WHERE annee = (SELECT MAX(annee) FROM TransportStats)
-        ORDER BY code_departement, score_securite DESC;
+        WHERE annee = (SELECT MAX(annee) FROM TransportStats);
         """
 
         try:
-            df = self.db.execute_query(query, (dept_depart, dept_arrivee))
-            logger.info(f"Données récupérées: {len(df)} lignes")
+            rows = self.db.execute_query(query, (dept_depart, dept_arrivee))
+            df = self._classify_transport_risks(rows)
+            logger.info("Données récupérées: %d lignes", len(df))
 
             if df.empty:
                 return df, "Aucune donnée trouvée pour ces départements"
@@ -691,17 +676,89 @@ class SecurityService:
             )
             return df, recommendations
         except Exception as e:
-            logger.error(f"Erreur dans _transport_security: {str(e)}")
+            logger.error("Erreur dans _transport_security: %s", e)
             logger.exception("Détails de l'erreur:")
             return pd.DataFrame(), "Erreur lors de l'analyse des données de transport"
 
+    def _classify_transport_risks(self, rows: pd.DataFrame) -> pd.DataFrame:
+        """Calcule évolutions, tendance, niveau de risque et score de sécurité"""
+        if rows.empty:
+            return rows
+
+        taux = rows["taux_pour_mille"].to_numpy(dtype=float)
+        taux_100k = rows["taux_100k"].to_numpy(dtype=float)
+        moyenne_mobile = rows["moyenne_mobile_taux"].to_numpy(dtype=float)
+        precedent = rows["taux_annee_precedente"].to_numpy(dtype=float)
+        rang = rows["rang_taux"].to_numpy(dtype=float)
+
+        # Chaque variation est calculée une seule fois ; NaN joue le rôle du
+        # NULL SQL et rend fausses les comparaisons, comme dans les CASE
+        with np.errstate(divide="ignore", invalid="ignore"):
+            evo = np.where(precedent == 0, np.nan, (taux - precedent) / precedent * 100)
+            evo_mm = np.where(
+                moyenne_mobile == 0,
+                np.nan,
+                (taux - moyenne_mobile) / moyenne_mobile * 100,
+            )
+        sans_precedent = np.isnan(evo)
+
+        # Classifications produites directement en codes de catégories : aucune
+        # chaîne n'est créée par ligne
+        tendance = np.select(
+            [
+                sans_precedent,
+                (evo > 20) | (evo_mm > 15),
+                (evo > 10) | (evo_mm > 10),
+                (evo < -20) | (evo_mm < -15),
+                (evo < -10) | (evo_mm < -10),
+                (np.abs(evo) <= 5) & (np.abs(evo_mm) <= 7),
+            ],
+            [3, 0, 1, 5, 4, 3],
+            default=2,
+        )
+        niveau_risque = np.select(
+            [
+                (taux_100k > 50)
+                | ((taux_100k > 40) & (evo > 15))
+                | ((rang == 1) & (evo > 0)),
+                (taux_100k > 35) | ((taux_100k > 25) & (evo > 10)) | (rang <= 2),
+                (taux_100k > 20) | ((taux_100k > 15) & (evo > 5)),
+                taux_100k > 10,
+            ],
+            [0, 1, 2, 3],
+            default=4,
+        )
+        # Seules les hausses pénalisent le score
+        penalite = np.where(evo > 0, evo * 0.4, 0.0) + np.where(
+            evo_mm > 0, evo_mm * 0.3, 0.0
+        )
+        score = np.clip(100 - taux_100k * 0.8 - penalite, 0, 100)
+
+        df = rows.drop(
+            columns=["moyenne_mobile_taux", "taux_annee_precedente", "rang_taux"]
+        ).astype(_COUNT_DTYPES).assign(
+            evolution_pourcentage=np.where(sans_precedent, 0.0, np.round(evo, 2)),
+            evolution_moyenne_mobile=np.where(
+                np.isnan(evo_mm), 0.0, np.round(evo_mm, 2)
+            ),
+            tendance=pd.Categorical.from_codes(tendance, _TRANSPORT_TENDANCES),
+            niveau_risque=pd.Categorical.from_codes(niveau_risque, _TRANSPORT_NIVEAUX),
+            score_securite=score,
+        )
+        df = df.sort_values(
+            ["code_departement", "score_securite"],
+            ascending=[True, False],
+            kind="stable",
+        )
+        return df.reset_index(drop=True)
+
     def _generate_real_estate_recommendations(self, df: pd.DataFrame) -> str:
         """Génère des recommandations pour la sécurité immobilière"""
         if df.empty:
             return "Aucune donnée disponible pour générer des recommandations"
 
-        # Calcul du score moyen (100 = moyenne nationale)
-        score_moyen = df["score_securite"].mean()
+        # Score moyen (0 = moyenne nationale) et scores s'écartant de plus de 30
+        score_moyen, extremes = score_summary(df["score_securite"].to_numpy(), 30)
 
         # Détermination du niveau de risque global
         if score_moyen < -20:
@@ -719,56 +776,37 @@ class SecurityService:
 
         # Analyse détaillée par type de crime
         recommendations.append("\nAnalyse détaillée :")
-        current_year_data = df[df["annee"] == df["annee"].max()]
-        for _, row in current_year_data.iterrows():
-            score = row["score_securite"]
-            signe = "+" if score > 0 else ""
-            recommendations.append(
-                f"- {row['type_crime']}: {signe}{score:.1f} vs moyenne nationale "
-                f"({row['nombre_faits']} incidents)"
-            )
+        annees = df["annee"].to_numpy()
+        current_year_data = df[annees == annees.max()]
+        recommendations.extend(
+            (
+                "- "
+                + current_year_data["type_crime"].astype(str)
+                + ": "
+                + _signed_scores(current_year_data["score_securite"])
+                + " vs moyenne nationale ("
+                + current_year_data["nombre_faits"].astype(str)
+                + " incidents)"
+            ).tolist()
+        )
 
         # Recommandations spécifiques selon le niveau de risque
         recommendations.append("\nRecommandations :")
-        if niveau_risque == "ÉLEVÉ":
-            recommendations.extend(
-                [
-                    "⚠️ Zone nécessitant des mesures de sécurité renforcées :",
-                    "• Installation de systèmes de sécurité avancés recommandée",
-                    "• Coordination avec le voisinage et les forces de l'ordre conseillée",
-                    "• Audit de sécurité détaillé avant acquisition",
-                    "• Souscription à une assurance renforcée à envisager",
-                ]
-            )
-        elif niveau_risque == "MODÉRÉ":
-            recommendations.extend(
-                [
-                    "⚠️ Vigilance recommandée :",
-                    "• Mesures de sécurité standards conseillées",
-                    "• Participation aux initiatives de voisinage vigilant",
-                    "• Vérification régulière des équipements de sécurité",
-                ]
-            )
-        else:
-            recommendations.extend(
-                [
-                    "✅ Zone sécurisée :",
-                    "• Maintien des mesures de sécurité basiques",
-                    "• Surveillance collaborative du voisinage",
-                    "• Possibilité de réduction sur les assurances",
-                ]
-            )
+        recommendations.extend(_REAL_ESTATE_ADVICE[niveau_risque])
 
         # Ajout des points d'attention pour les scores très différents de la moyenne
-        significant_changes = df[abs(df["score_securite"]) > 30]
+        significant_changes = df[extremes]
         if not significant_changes.empty:
             recommendations.append("\nPoints d'attention particuliers :")
-            for _, change in significant_changes.iterrows():
-                signe = "+" if change["score_securite"] > 0 else ""
-                recommendations.append(
-                    f"• {change['type_crime']}: {signe}{change['score_securite']:.1f} "
-                    f"par rapport à la moyenne nationale"
-                )
+            recommendations.extend(
+                (
+                    "• "
+                    + significant_changes["type_crime"].astype(str)
+                    + ": "
+                    + _signed_scores(significant_changes["score_securite"])
+                    + " par rapport à la moyenne nationale"
+                ).tolist()
+            )
 
         return "\n".join(recommendations)
 
@@ -777,87 +815,71 @@ class SecurityService:
         if df.empty:
             return "Aucune donnée disponible pour générer des alertes"
 
-        # Conversion des None en NaN pour faciliter le filtrage
-        df_clean = df.copy()
-        df_clean["evolution_pourcentage"] = pd.to_numeric(
-            df_clean["evolution_pourcentage"], errors="coerce"
-        )
+        # Conversion des None en NaN pour faciliter le filtrage ; seule cette
+        # colonne est convertie, sans copier le DataFrame
+        evolutions = pd.to_numeric(
+            df["evolution_pourcentage"], errors="coerce"
+        ).to_numpy(dtype=float)
 
-        alerts = df_clean[
-            df_clean["niveau_alerte"].isin(["ALERTE ROUGE", "ALERTE ORANGE"])
-        ]
+        # Masques calculés une seule fois sur les colonnes
+        alert_mask = df["niveau_alerte"].isin(list(_ALERT_ADVICE)).to_numpy()
+        trend_mask = ~np.isnan(evolutions) & (np.abs(evolutions) > 15)
+
+        alerts = df[alert_mask]
         recommendations = ["🚨 Système d'alerte de voisinage :"]
 
         # Analyse des alertes actives
         if not alerts.empty:
             recommendations.append("\nPoints d'attention critiques :")
-            for _, alert in alerts.iterrows():
-                z_score = alert["z_score"]
-                taux = alert["taux_pour_mille"]
-                recommendations.append(
-                    f"- {alert['type_crime']}: {alert['niveau_alerte']} "
-                    f"(Intensité: {z_score:.1f}σ, Taux: {taux:.1f}‰)"
-                )
+            columns = ["type_crime", "niveau_alerte", "z_score", "taux_pour_mille"]
+            for alert in alerts[columns].itertuples(index=False):
+                recommendations.append(_ALERT_TEMPLATE.format_map(alert._asdict()))
 
                 # Recommandations selon le niveau d'alerte
-                if alert["niveau_alerte"] == "ALERTE ROUGE":
-                    recommendations.extend(
-                        [
-                            "  • Éviter les zones isolées",
-                            "  • Renforcer la vigilance collective",
-                            "  • Signaler toute activité suspecte",
-                            "  • Contact régulier avec les forces de l'ordre",
-                        ]
-                    )
-                elif alert["niveau_alerte"] == "ALERTE ORANGE":
-                    recommendations.extend(
-                        [
-                            "  • Vigilance accrue recommandée",
-                            "  • Coordination avec le voisinage",
-                            "  • Vérification des dispositifs de sécurité",
-                        ]
-                    )
+                recommendations.extend(_ALERT_ADVICE[alert.niveau_alerte])
         else:
-            recommendations.extend(
-                [
-                    "✅ Aucune alerte majeure active",
-                    "• Maintien de la vigilance normale",
-                    "• Poursuite des bonnes pratiques de sécurité",
-                ]
-            )
+            recommendations.extend(_ALERT_ADVICE_NONE)
 
         # Analyse des tendances significatives
-        significant_trends = df_clean[
-            df_clean["evolution_pourcentage"].notna()
-            & (abs(df_clean["evolution_pourcentage"]) > 15)
-        ]
+        significant_trends = df[trend_mask]
 
         if not significant_trends.empty:
-            recommendations.append("\nTendances significatives à surveiller :")
-            for _, trend in significant_trends.iterrows():
-                evol = trend["evolution_pourcentage"]
-                taux = trend["taux_pour_mille"]
-                taux_prec = (
-                    trend["taux_precedent"] if pd.notna(trend["taux_precedent"]) else 0
-                )
+            # Conseil associé à chaque hausse importante, vide pour les baisses
+            trend_evol = evolutions[trend_mask]
+            advice = np.select(
+                [trend_evol > 30, trend_evol > 15],
+                [
+                    "  • Vigilance particulière recommandée sur ce type d'incident",
+                    "  • Situation à surveiller dans les prochains mois",
+                ],
+                default="",
+            )
 
-                # Détermination de l'icône selon l'évolution
-                icon = "📈" if evol > 0 else "📉"
+            # Détermination de l'icône selon l'évolution
+            icons = np.where(trend_evol > 0, "📈", "📉")
+
+            recommendations.append("\nTendances significatives à surveiller :")
+            columns = ["type_crime", "taux_pour_mille", "taux_precedent"]
+            rows = significant_trends[columns].itertuples(index=False, name=None)
+            for (type_crime, taux, taux_prec), evol, icon, trend_advice in zip(
+                rows, trend_evol, icons, advice
+            ):
+                if pd.isna(taux_prec):
+                    taux_prec = 0
 
                 recommendations.append(
-                    f"- {icon} {trend['type_crime']}: {evol:+.1f}% d'évolution "
-                    f"(Taux actuel: {taux:.1f}‰, Précédent: {taux_prec:.1f}‰)"
+                    _TREND_TEMPLATE.format(
+                        icon=icon,
+                        type_crime=type_crime,
+                        evolution=evol,
+                        taux=taux,
+                        taux_precedent=taux_prec,
+                    )
                 )
 
                 # Ajout de conseils spécifiques pour les hausses importantes
-                if evol > 30:
-                    recommendations.append(
-                        "  • Vigilance particulière recommandée sur ce type d'incident"
-                    )
-                elif evol > 15:
-                    recommendations.append(
-                        "  • Situation à surveiller dans les prochains mois"
-                    )
+                if trend_advice:
+                    recommendations.append(trend_advice)
 
         return "\n".join(recommendations)
 
@@ -880,32 +902,28 @@ class SecurityService:
         # Filtrer les lignes avec des valeurs non nulles
         df_clean = df.dropna(subset=["niveau_risque_commercial", "risque_commercial"])
 
-        # Analyse par niveau de risque
-        for risk_level in df_clean["niveau_risque_commercial"].unique():
-            group = df_clean[df_clean["niveau_risque_commercial"] == risk_level]
-            if group.empty:
-                continue
-
+        # Analyse par niveau de risque : un seul découpage en groupes, dans
+        # l'ordre d'apparition des niveaux
+        for risk_level, group in df_clean.groupby(
+            "niveau_risque_commercial", sort=False, observed=True
+        ):
             recommendations.append(f"\n{risk_level} :")
-            for _, row in group.iterrows():
-                risk_score = row["risque_commercial"]
-                if pd.notna(risk_score):  # Vérification explicite des valeurs non-NA
-                    recommendations.append(
-                        f"- {row['type_crime']}: {risk_score:.2f} incidents pour 10000 habitants"
-                    )
-
-                    # Recommandations spécifiques selon le niveau de risque
-                    if risk_level == "CRITIQUE":
-                        recommendations.append(
-                            "  • Installation recommandée de système de sécurité avancé"
-                            "\n  • Coordination conseillée avec les services de police"
-                            "\n  • Formation du personnel aux situations à risque"
-                        )
-                    elif risk_level == "ÉLEVÉ":
-                        recommendations.append(
-                            "  • Renforcement de la surveillance pendant les heures à risque"
-                            "\n  • Mise en place de procédures de sécurité standard"
-                        )
+            lines = (
+                "- "
+                + group["type_crime"].astype(str)
+                + ": "
+                + np.char.mod("%.2f", group["risque_commercial"].to_numpy(dtype=float))
+                + " incidents pour 10000 habitants"
+            ).tolist()
+
+            # Recommandations spécifiques selon le niveau de risque, après
+            # chaque type de crime
+            advice = _BUSINESS_ADVICE.get(risk_level)
+            if advice is None:
+                recommendations.extend(lines)
+            else:
+                for line in lines:
+                    recommendations.extend((line, advice))
 
         # Analyse temporelle si disponible
         if "evolution_pourcentage" in df.columns:
@@ -915,11 +933,16 @@ class SecurityService:
             ]
             if not trends.empty:
                 recommendations.append("\nTendances significatives :")
-                for _, trend in trends.iterrows():
-                    recommendations.append(
-                        f"- {trend['type_crime']}: {trend['evolution_pourcentage']:+.1f}% "
-                        f"sur la période"
-                    )
+                evolutions = trends["evolution_pourcentage"].to_numpy(dtype=float)
+                recommendations.extend(
+                    (
+                        "- "
+                        + trends["type_crime"].astype(str)
+                        + ": "
+                        + np.char.mod("%+.1f", evolutions)
+                        + "% sur la période"
+                    ).tolist()
+                )
 
         return "\n".join(recommendations)
 
@@ -944,42 +967,20 @@ class SecurityService:
             if quintile_data.empty:
                 continue
 
-            risk_level = (
-                "TRÈS ÉLEVÉ"
-                if quintile == 5
-                else "ÉLEVÉ"
-                if quintile == 4
-                else "MOYEN"
-                if quintile == 3
-                else "FAIBLE"
-                if quintile == 2
-                else "TRÈS FAIBLE"
-            )
+            risk_level = _QUINTILE_LABELS[quintile]
 
             recommendations.append(f"\nNiveau de risque {risk_level} :")
-            for _, row in quintile_data.iterrows():
-                if pd.notna(row["indice_relatif"]):
+            rows = quintile_data[["type_crime", "indice_relatif"]].itertuples(
+                index=False, name=None
+            )
+            for type_crime, indice_relatif in rows:
+                if pd.notna(indice_relatif):
                     recommendations.append(
-                        f"- {row['type_crime']}: Indice relatif {row['indice_relatif']:.1f}%"
+                        f"- {type_crime}: Indice relatif {indice_relatif:.1f}%"
                     )
 
                     # Recommandations spécifiques par niveau de risque
-                    if quintile >= 4:
-                        recommendations.append(
-                            "  • Majoration recommandée des primes"
-                            "\n  • Audit de sécurité conseillé"
-                            "\n  • Clauses de prévention à renforcer"
-                        )
-                    elif quintile == 3:
-                        recommendations.append(
-                            "  • Primes standards avec options de réduction"
-                            "\n  • Mesures de prévention basiques conseillées"
-                        )
-                    else:
-                        recommendations.append(
-                            "  • Eligible aux réductions de prime"
-                            "\n  • Offres packagées possibles"
-                        )
+                    recommendations.append(_QUINTILE_ADVICE[quintile])
 
         return "\n".join(recommendations)
 
@@ -992,60 +993,74 @@ class SecurityService:
 
         recommendations = [f"🚛 Analyse de sécurité : {dept_depart} → {dept_arrivee}"]
 
+        # Points d'attention par département et points de vigilance majeurs,
+        # collectés en un seul parcours des lignes à risque ou en hausse
+        risque_eleve = (df["niveau_risque"] == "RISQUE ÉLEVÉ").to_numpy()
+        en_hausse = (df["tendance"] == "EN HAUSSE").to_numpy()
+        flagged = risque_eleve | en_hausse
+        columns = ["code_departement", "type_crime", "taux_100k", "tendance"]
+        rows = df.loc[flagged, columns].itertuples(index=False, name=None)
+        icons = np.where(en_hausse, "📈", "📊")[flagged]
+        majeurs = (risque_eleve & en_hausse)[flagged]
+
+        points_attention = {dept: [] for dept in (dept_depart, dept_arrivee)}
+        vigilance = []
+        for (code_departement, type_crime, taux_100k, tendance), icon, majeur in zip(
+            rows, icons, majeurs
+        ):
+            if code_departement in points_attention:
+                points_attention[code_departement].append(
+                    f"- {icon} {type_crime}: "
+                    f"{taux_100k:.1f} incidents/100k hab. "
+                    f"({tendance.lower()})"
+                )
+            if majeur:
+                vigilance.append(
+                    f"- Dept {code_departement}: {type_crime} "
+                    f"({taux_100k:.1f} incidents/100k hab.)"
+                )
+
         # 1. Analyse des départements
+        dept_positions = df.groupby("code_departement", sort=False).indices
+        scores = df["score_securite"].to_numpy(dtype=float)
         for dept in [dept_depart, dept_arrivee]:
-            dept_data = df[df["code_departement"] == dept]
-            if not dept_data.empty:
-                score_moyen = dept_data["score_securite"].mean()
+            positions = dept_positions.get(dept)
+            if positions is not None:
+                score_moyen, _ = score_summary(scores[positions], 100)
                 recommendations.append(
                     f"\n📍 Département {dept} "
                     f"(Score de sécurité: {score_moyen:.0f}/100) :"
                 )
 
                 # Points d'attention spécifiques avec tendances
-                risques_eleves = dept_data[
-                    (dept_data["niveau_risque"] == "RISQUE ÉLEVÉ")
-                    | (dept_data["tendance"] == "EN HAUSSE")
-                ]
-                for _, risque in risques_eleves.iterrows():
-                    tendance_icon = "📈" if risque["tendance"] == "EN HAUSSE" else "📊"
-                    recommendations.append(
-                        f"- {tendance_icon} {risque['type_crime']}: "
-                        f"{risque['taux_100k']:.1f} incidents/100k hab. "
-                        f"({risque['tendance'].lower()})"
-                    )
+                recommendations.extend(points_attention[dept])
 
         # 2. Comparaison des risques entre départements
         recommendations.append("\n🔄 Analyse comparative :")
-        for type_crime in df["type_crime"].unique():
-            crime_data = df[df["type_crime"] == type_crime]
-            if len(crime_data) == 2:  # Si on a des données pour les deux départements
-                depart_rate = crime_data[crime_data["code_departement"] == dept_depart][
-                    "taux_100k"
-                ].iloc[0]
-                arrivee_rate = crime_data[
-                    crime_data["code_departement"] == dept_arrivee
-                ]["taux_100k"].iloc[0]
-                diff_rate = abs(depart_rate - arrivee_rate)
-
-                if diff_rate > 10:  # Différence significative
-                    higher_dept = (
-                        dept_arrivee if arrivee_rate > depart_rate else dept_depart
-                    )
-                    recommendations.append(
-                        f"- {type_crime}: {diff_rate:.1f} incidents/100k hab. de plus dans le dept {higher_dept}"
-                    )
+        # Un taux par type de crime et par département ; NaN si l'un manque
+        rates = df.pivot(
+            index="type_crime", columns="code_departement", values="taux_100k"
+        ).reindex(index=df["type_crime"].unique(), columns=[dept_depart, dept_arrivee])
+        depart_rates = rates.iloc[:, 0].to_numpy(dtype=float)
+        arrivee_rates = rates.iloc[:, 1].to_numpy(dtype=float)
+        diff_rates = np.abs(depart_rates - arrivee_rates)
+
+        significant = diff_rates > 10  # Différence significative
+        higher_dept = np.where(arrivee_rates > depart_rates, dept_arrivee, dept_depart)
+        recommendations.extend(
+            (
+                "- "
+                + pd.Series(rates.index[significant], dtype=str)
+                + ": "
+                + np.char.mod("%.1f", diff_rates[significant])
+                + " incidents/100k hab. de plus dans le dept "
+                + higher_dept[significant]
+            ).tolist()
+        )
 
         # 3. Points de vigilance pour l'itinéraire
-        risques_majeurs = df[
-            (df["niveau_risque"] == "RISQUE ÉLEVÉ") & (df["tendance"] == "EN HAUSSE")
-        ]
-        if not risques_majeurs.empty:
+        if vigilance:
             recommendations.append("\n⚠️ Points de vigilance majeurs :")
-            for _, risque in risques_majeurs.iterrows():
-                recommendations.append(
-                    f"- Dept {risque['code_departement']}: {risque['type_crime']} "
-                    f"({risque['taux_100k']:.1f} incidents/100k hab.)"
-                )
+            recommendations.extend(vigilance)
 
         return "\n".join(recommendations)
@@ -1,7 +1,8 @@
 import logging
-from typing import Tuple
+from typing import Callable, Dict, List, Tuple
 
 import gradio as gr
+import numpy as np
 import pandas as pd
 
 from database.database import DatabaseConnection
@@ -9,87 +10,94 @@ from view.territorial_view import TerritorialVisualization
 
 logger = logging.getLogger(__name__)
 
+# Espace réservé partagé par toutes les sorties sans graphique ; un tuple
+# immuable évite qu'un graphique rempli ne fuie dans les retours vides
+_EMPTY_PLOT = gr.Plot()
+_EMPTY_PLOTS = (_EMPTY_PLOT, _EMPTY_PLOT)
+
+# Gabarits des lignes de recommandations, remplis par format_map
+_DEPT_RATE_TEMPLATE = "- {type_crime}: {taux_pour_mille:.1f}‰"
+_GAP_TEMPLATE = (
+    "- {code_departement} ({type_crime}): "
+    "{ecart_moyenne:+.1f}% vs moyenne régionale"
+)
+_LEVEL_TEMPLATE = "- {code_departement} ({type_crime}): {taux_pour_mille:.1f}‰"
+_DIFFERENCE_TEMPLATE = (
+    "- {type_crime}: {ecart_pourcentage:+.1f}% "
+    "(Taux: {taux_moyen:.1f}‰ vs {taux_compare:.1f}‰)"
+)
+_EVOLUTION_TEMPLATE = (
+    "- {type_crime} ({annee}): {tendance} ({evolution_pourcentage:+.1f}%)"
+)
+
+
+def _format_rows(template: str, df: pd.DataFrame) -> List[str]:
+    """Formate chaque ligne du DataFrame avec le gabarit donné"""
+    return [template.format_map(row._asdict()) for row in df.itertuples(index=False)]
+
 
 class TerritorialService:
     def __init__(self):
         self.db = DatabaseConnection()
         self.visualizer = TerritorialVisualization()
+        # Service -> (analyse, constructeurs des deux graphiques) : une seule
+        # recherche par requête, et un service s'ajoute sans nouvelle branche
+        self._handlers: Dict[str, Tuple[Callable, Tuple[Callable, Callable]]] = {
+            "Diagnostic Régional": (
+                lambda region_ref, region_comp: self._diagnostic_regional(region_ref),
+                (
+                    self.visualizer.create_regional_heatmap,
+                    self.visualizer.create_regional_radar,
+                ),
+            ),
+            "Comparaison Inter-Régionale": (
+                self._comparaison_interregionale,
+                (
+                    self.visualizer.create_interregional_bars,
+                    self.visualizer.create_interregional_boxplot,
+                ),
+            ),
+            "Évolution Régionale": (
+                lambda region_ref, region_comp: self._evolution_regionale(region_ref),
+                (
+                    self.visualizer.create_temporal_evolution,
+                    self.visualizer.create_temporal_heatmap,
+                ),
+            ),
+        }
 
     def process_request(
         self, service: str, region_ref: str, region_comp: str = None, **kwargs
     ) -> Tuple[pd.DataFrame, str, gr.Plot, gr.Plot]:
         """Traite les requêtes d'analyse territoriale"""
         try:
-            empty_plots = [gr.Plot(), gr.Plot()]
-
-            if service == "Diagnostic Régional":
-                df, recommendations = self._diagnostic_regional(region_ref)
-                if df.empty:
-                    return df, recommendations, *empty_plots
-
-                plots = empty_plots
-                # Création de la heatmap régionale
-                heatmap = self.visualizer.create_regional_heatmap(df)
-                if heatmap is not None:
-                    plots[0] = gr.Plot(heatmap)
-
-                # Création du radar régional
-                radar = self.visualizer.create_regional_radar(df)
-                if radar is not None:
-                    plots[1] = gr.Plot(radar)
-
-                return df, recommendations, *plots
-
-            elif service == "Comparaison Inter-Régionale":
-                if not region_comp:
-                    return (
-                        pd.DataFrame(),
-                        "Veuillez sélectionner une région à comparer",
-                        *empty_plots,
-                    )
-
-                # [Le reste du code existant pour la comparaison reste inchangé]
-                df, recommendations = self._comparaison_interregionale(
-                    region_ref, region_comp
+            handler = self._handlers.get(service)
+            if handler is None:
+                return pd.DataFrame(), "Service non reconnu", *_EMPTY_PLOTS
+
+            if service == "Comparaison Inter-Régionale" and not region_comp:
+                return (
+                    pd.DataFrame(),
+                    "Veuillez sélectionner une région à comparer",
+                    *_EMPTY_PLOTS,
                 )
-                if df.empty:
-                    return df, recommendations, *empty_plots
 
-                plots = empty_plots
-                bars = self.visualizer.create_interregional_bars(df)
-                if bars is not None:
-                    plots[0] = gr.Plot(bars)
+            analysis, plot_builders = handler
+            df, recommendations = analysis(region_ref, region_comp)
+            if df.empty:
+                return df, recommendations, *_EMPTY_PLOTS
 
-                boxplot = self.visualizer.create_interregional_boxplot(df)
-                if boxplot is not None:
-                    plots[1] = gr.Plot(boxplot)
+            plots = []
+            for build_plot in plot_builders:
+                figure = build_plot(df)
+                plots.append(gr.Plot(figure) if figure is not None else _EMPTY_PLOT)
 
-                return df, recommendations, *plots
-
-            elif service == "Évolution Régionale":
-                # [Le reste du code existant pour l'évolution reste inchangé]
-                df, recommendations = self._evolution_regionale(region_ref)
-                if df.empty:
-                    return df, recommendations, *empty_plots
-
-                plots = empty_plots
-                evolution = self.visualizer.create_temporal_evolution(df)
-                if evolution is not None:
-                    plots[0] = gr.Plot(evolution)
-
-                heatmap = self.visualizer.create_temporal_heatmap(df)
-                if heatmap is not None:
-                    plots[1] = gr.Plot(heatmap)
-
-                return df, recommendations, *plots
-
-            else:
-                return pd.DataFrame(), "Service non reconnu", *empty_plots
+            return df, recommendations, *plots
 
         except Exception as e:
             logger.error(f"Erreur dans process_request: {str(e)}")
             logger.exception("Détails de l'erreur:")
-            return pd.DataFrame(), f"Erreur: {str(e)}", *empty_plots
+            return pd.DataFrame(), f"Erreur: {str(e)}", *_EMPTY_PLOTS
 
     def _diagnostic_regional(self, region: str) -> Tuple[pd.DataFrame, str]:
         """Analyse les départements au sein d'une région"""
@@ -127,8 +135,8 @@ class TerritorialService:
             CASE 
                 WHEN taux_pour_mille > moyenne_regionale * 1.5 THEN 'TRÈS ÉLEVÉ'
                 WHEN taux_pour_mille > moyenne_regionale * 1.2 THEN 'ÉLEVÉ'
-                WHEN taux_pour_mille < moyenne_regionale * 0.8 THEN 'FAIBLE'
                 WHEN taux_pour_mille < moyenne_regionale * 0.5 THEN 'TRÈS FAIBLE'
+                WHEN taux_pour_mille < moyenne_regionale * 0.8 THEN 'FAIBLE'
                 ELSE 'MOYEN'
             END as niveau_relatif
         FROM RegionalStats
@@ -148,52 +156,25 @@ class TerritorialService:
         self, region_ref: str, region_comp: str
     ) -> Tuple[pd.DataFrame, str]:
         """Compare deux régions spécifiques"""
+        # Lignes brutes de l'année la plus récente : les agrégats régionaux
+        # sont calculés en une passe groupby côté Python
         query = """
-        WITH RegionStats AS (
-            SELECT 
-                d.code_region,
-                d.code_departement,
-                c.type_crime,
-                c.annee,
-                s.taux_pour_mille,
-                COUNT(*) OVER (PARTITION BY d.code_region, c.type_crime) as nb_departements,
-                AVG(s.taux_pour_mille) OVER (PARTITION BY d.code_region, c.type_crime) as taux_moyen,
-                MIN(s.taux_pour_mille) OVER (PARTITION BY d.code_region, c.type_crime) as taux_min,
-                MAX(s.taux_pour_mille) OVER (PARTITION BY d.code_region, c.type_crime) as taux_max,
-                STDDEV(s.taux_pour_mille) OVER (PARTITION BY d.code_region, c.type_crime) as ecart_type,
-                CASE 
-                    WHEN d.code_region = %s THEN 'RÉGION_RÉFÉRENCE'
-                    ELSE 'RÉGION_COMPARÉE'
-                END as type_region
-            FROM crimes c
-            JOIN statistiques s ON c.id_crime = s.id_crime
-            JOIN departements d ON s.code_departement = d.code_departement
-            WHERE d.code_region IN (%s, %s)
-            AND c.annee = (SELECT MAX(annee) FROM crimes)
-        )
         SELECT 
-            rs.*,
-            ROUND(
-                CASE 
-                    WHEN rs.type_region = 'RÉGION_RÉFÉRENCE' THEN
-                        ((rs.taux_moyen - comp.taux_moyen) / NULLIF(comp.taux_moyen, 0) * 100)
-                    ELSE
-                        ((comp.taux_moyen - rs.taux_moyen) / NULLIF(rs.taux_moyen, 0) * 100)
-                END, 
-            2) as ecart_pourcentage
-        FROM RegionStats rs
-        JOIN (
-            SELECT type_crime, taux_moyen
-            FROM RegionStats
-            WHERE type_region = 'RÉGION_RÉFÉRENCE'
-            GROUP BY type_crime, taux_moyen
-        ) comp ON rs.type_crime = comp.type_crime
-        ORDER BY rs.type_crime, rs.code_region, rs.taux_pour_mille;
+            d.code_region,
+            d.code_departement,
+            c.type_crime,
+            c.annee,
+            s.taux_pour_mille
+        FROM crimes c
+        JOIN statistiques s ON c.id_crime = s.id_crime
+        JOIN departements d ON s.code_departement = d.code_departement
+        WHERE d.code_region IN (%s, %s)
+        AND c.annee = (SELECT MAX(annee) FROM crimes);
         """
 
         try:
-            params = (region_ref, region_ref, region_comp)
-            df = self.db.execute_query(query, params)
+            rows = self.db.execute_query(query, (region_ref, region_comp))
+            df = self._compute_region_comparison(rows, region_ref)
             recommendations = self._generate_comparison_recommendations(
                 df, region_ref, region_comp
             )
@@ -203,50 +184,103 @@ class TerritorialService:
             logger.error(f"Erreur dans _comparaison_interregionale: {str(e)}")
             return pd.DataFrame(), "Erreur lors de la comparaison inter-régionale"
 
+    def _compute_region_comparison(
+        self, rows: pd.DataFrame, region_ref: str
+    ) -> pd.DataFrame:
+        """Calcule les statistiques régionales et les écarts à la référence"""
+        if rows.empty:
+            return rows
+
+        rates = rows.groupby(["code_region", "type_crime"], sort=False)[
+            "taux_pour_mille"
+        ]
+        df = rows.assign(
+            nb_departements=rates.transform("size"),
+            taux_moyen=rates.transform("mean"),
+            taux_min=rates.transform("min"),
+            taux_max=rates.transform("max"),
+            # Écart-type de population, comme STDDEV() côté MySQL
+            ecart_type=rates.transform("std", ddof=0),
+            type_region=np.where(
+                rows["code_region"] == region_ref,
+                "RÉGION_RÉFÉRENCE",
+                "RÉGION_COMPARÉE",
+            ),
+        )
+
+        # Moyenne de référence par type de crime ; les types absents de la
+        # région de référence sont écartés
+        reference = (
+            df.loc[df["type_region"] == "RÉGION_RÉFÉRENCE"]
+            .drop_duplicates("type_crime")
+            .set_index("type_crime")["taux_moyen"]
+        )
+        df = df[df["type_crime"].isin(reference.index)]
+        ref_moyen = df["type_crime"].map(reference).to_numpy(dtype=float)
+        taux_moyen = df["taux_moyen"].to_numpy(dtype=float)
+
+        is_ref = df["type_region"].to_numpy() == "RÉGION_RÉFÉRENCE"
+        numerator = np.where(is_ref, taux_moyen - ref_moyen, ref_moyen - taux_moyen)
+        denominator = np.where(is_ref, ref_moyen, taux_moyen)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ecart = np.where(denominator == 0, np.nan, numerator / denominator * 100)
+
+        df = df.assign(ecart_pourcentage=np.round(ecart, 2))
+        df = df.sort_values(
+            ["type_crime", "code_region", "taux_pour_mille"], kind="stable"
+        )
+        return df.reset_index(drop=True)
+
     def _evolution_regionale(self, region: str) -> Tuple[pd.DataFrame, str]:
         """Analyse l'évolution temporelle des tendances régionales"""
         query = """
         WITH YearlyStats AS (
+            -- Agrégats annuels précalculés au chargement dans stats_regionales
             SELECT 
-                d.code_region,
-                c.type_crime,
-                c.annee,
-                AVG(s.taux_pour_mille) as taux_moyen,
-                MIN(s.taux_pour_mille) as taux_min,
-                MAX(s.taux_pour_mille) as taux_max,
-                STDDEV(s.taux_pour_mille) as ecart_type,
-                LAG(AVG(s.taux_pour_mille)) OVER (
-                    PARTITION BY d.code_region, c.type_crime
-                    ORDER BY c.annee
+                code_region,
+                type_crime,
+                annee,
+                taux_moyen,
+                taux_min,
+                taux_max,
+                ecart_type,
+                LAG(taux_moyen) OVER (
+                    PARTITION BY code_region, type_crime
+                    ORDER BY annee
                 ) as taux_annee_precedente
-            FROM crimes c
-            JOIN statistiques s ON c.id_crime = s.id_crime
-            JOIN departements d ON s.code_departement = d.code_departement
-            WHERE d.code_region = %s
-            GROUP BY d.code_region, c.type_crime, c.annee
+            FROM stats_regionales
+            WHERE code_region = %s
+        ),
+        Evolution AS (
+            -- Variation annuelle calculée une seule fois par ligne
+            SELECT 
+                *,
+                (taux_moyen - taux_annee_precedente) / 
+                    NULLIF(taux_annee_precedente, 0) * 100 as variation
+            FROM YearlyStats
         )
         SELECT 
-            *,
+            code_region,
+            type_crime,
+            annee,
+            taux_moyen,
+            taux_min,
+            taux_max,
+            ecart_type,
+            taux_annee_precedente,
             CASE 
                 WHEN taux_annee_precedente IS NULL THEN 0
-                ELSE ROUND(
-                    ((taux_moyen - taux_annee_precedente) / 
-                    NULLIF(taux_annee_precedente, 0) * 100), 
-                2)
+                ELSE ROUND(variation, 2)
             END as evolution_pourcentage,
             CASE 
                 WHEN taux_annee_precedente IS NULL THEN 'ANNÉE INITIALE'
-                WHEN ((taux_moyen - taux_annee_precedente) / 
-                    NULLIF(taux_annee_precedente, 0) * 100) > 20 THEN 'FORTE HAUSSE'
-                WHEN ((taux_moyen - taux_annee_precedente) / 
-                    NULLIF(taux_annee_precedente, 0) * 100) > 10 THEN 'HAUSSE'
-                WHEN ((taux_moyen - taux_annee_precedente) / 
-                    NULLIF(taux_annee_precedente, 0) * 100) < -20 THEN 'FORTE BAISSE'
-                WHEN ((taux_annee_precedente) / 
-                    NULLIF(taux_annee_precedente, 0) * 100) < -10 THEN 'BAISSE'
+                WHEN variation > 20 THEN 'FORTE HAUSSE'
+                WHEN variation > 10 THEN 'HAUSSE'
+                WHEN variation < -20 THEN 'FORTE BAISSE'
+                WHEN variation < -10 THEN 'BAISSE'
                 ELSE 'STABLE'
             END as tendance
-        FROM YearlyStats
+        FROM Evolution
         ORDER BY type_crime, annee;
         """
 
@@ -284,31 +318,23 @@ class TerritorialService:
             )
 
             # Ajout des statistiques par type de crime
-            for _, row in df.iterrows():
-                recommendations.append(
-                    f"- {row['type_crime']}: {row['taux_pour_mille']:.1f}‰"
-                )
+            recommendations.extend(_format_rows(_DEPT_RATE_TEMPLATE, df))
         else:
             # Analyse des écarts significatifs
             ecarts_importants = df[abs(df["ecart_moyenne"]) > 20]
             if not ecarts_importants.empty:
                 recommendations.append("\nDépartements avec écarts significatifs :")
-                for _, row in ecarts_importants.iterrows():
-                    recommendations.append(
-                        f"- {row['code_departement']} ({row['type_crime']}): "
-                        f"{row['ecart_moyenne']:+.1f}% vs moyenne régionale"
-                    )
+                recommendations.extend(_format_rows(_GAP_TEMPLATE, ecarts_importants))
 
-            # Analyse des niveaux relatifs
+            # Analyse des niveaux relatifs : un seul regroupement pour tous
+            positions_par_niveau = df.groupby("niveau_relatif", sort=False).indices
             for niveau in ["TRÈS ÉLEVÉ", "TRÈS FAIBLE"]:
-                niveau_data = df[df["niveau_relatif"] == niveau]
-                if not niveau_data.empty:
+                positions = positions_par_niveau.get(niveau)
+                if positions is not None:
                     recommendations.append(f"\nDépartements de niveau {niveau} :")
-                    for _, row in niveau_data.iterrows():
-                        recommendations.append(
-                            f"- {row['code_departement']} ({row['type_crime']}): "
-                            f"{row['taux_pour_mille']:.1f}‰"
-                        )
+                    recommendations.extend(
+                        _format_rows(_LEVEL_TEMPLATE, df.iloc[positions])
+                    )
 
         return "\n".join(recommendations)
 
@@ -338,12 +364,14 @@ class TerritorialService:
         ecarts_significatifs = ref_data[abs(ref_data["ecart_pourcentage"]) > 20]
         if not ecarts_significatifs.empty:
             recommendations.append("\nDifférences significatives :")
-            for _, row in ecarts_significatifs.iterrows():
-                signe = "+" if row["ecart_pourcentage"] > 0 else ""
-                recommendations.append(
-                    f"- {row['type_crime']}: {signe}{row['ecart_pourcentage']:.1f}% "
-                    f"(Taux: {row['taux_moyen']:.1f}‰ vs {row['taux_moyen']/(1 + row['ecart_pourcentage']/100):.1f}‰)"
-                )
+            # Taux de la région comparée, retrouvé à partir de l'écart relatif
+            ecarts_significatifs = ecarts_significatifs.assign(
+                taux_compare=ecarts_significatifs["taux_moyen"]
+                / (1 + ecarts_significatifs["ecart_pourcentage"] / 100)
+            )
+            recommendations.extend(
+                _format_rows(_DIFFERENCE_TEMPLATE, ecarts_significatifs)
+            )
 
         return "\n".join(recommendations)
 
@@ -358,10 +386,6 @@ class TerritorialService:
         tendances = df[df["tendance"].isin(["FORTE HAUSSE", "FORTE BAISSE"])]
         if not tendances.empty:
             recommendations.append("\nÉvolutions significatives :")
-            for _, row in tendances.iterrows():
-                recommendations.append(
-                    f"- {row['type_crime']} ({row['annee']}): {row['tendance']} "
-                    f"({row['evolution_pourcentage']:+.1f}%)"
-                )
+            recommendations.extend(_format_rows(_EVOLUTION_TEMPLATE, tendances))
 
         return "\n".join(recommendations)
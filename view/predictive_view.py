@@ -1,5 +1,5 @@
 import logging
-from typing import Optional
+from typing import Dict, List, NamedTuple, Optional, Tuple
 
 import numpy as np
 import pandas as pd
@@ -8,6 +8,16 @@ import plotly.graph_objects as go
 logger = logging.getLogger(__name__)
 
 
+class ProjectionSeries(NamedTuple):
+    """Série d'un type de crime, colonne par colonne, pour les graphiques"""
+
+    years: np.ndarray
+    projection: np.ndarray
+    lower_bound: np.ndarray
+    upper_bound: np.ndarray
+    is_projection: np.ndarray
+
+
 class PredictiveVisualization:
     """Classe gérant toutes les visualisations liées à l'analyse prédictive"""
 
@@ -23,79 +33,132 @@ class PredictiveVisualization:
             return False
         return True
 
-    def create_projection_curve(self, df: pd.DataFrame) -> Optional[go.Figure]:
-        """Crée une courbe d'évolution avec projections futures"""
-        try:
-            required_columns = [
-                "type_crime",
-                "annee",
-                "projection",
-                "lower_bound",
-                "upper_bound",
-                "data_type",
-            ]
-            if not self._validate_dataframe(df, required_columns):
-                return None
-
-            fig = go.Figure()
+    def _prepare_projection_data(
+        self, df: pd.DataFrame
+    ) -> Optional[Dict[str, ProjectionSeries]]:
+        """Regroupe une seule fois les projections par type de crime"""
+        required_columns = [
+            "type_crime",
+            "annee",
+            "projection",
+            "lower_bound",
+            "upper_bound",
+            "data_type",
+        ]
+        if not self._validate_dataframe(df, required_columns):
+            return None
 
-            # Pour chaque type de crime
-            for crime in df["type_crime"].unique():
-                crime_data = df[df["type_crime"] == crime]
-
-                # Données historiques
-                historical = crime_data[crime_data["data_type"] == "HISTORIQUE"]
-                fig.add_trace(
-                    go.Scatter(
-                        x=historical["annee"],
-                        y=historical["projection"],
-                        name=f"{crime} (Historique)",
-                        mode="lines+markers",
-                        line=dict(width=2),
-                        hovertemplate=(
-                            "Année: %{x}<br>"
-                            + "Taux: %{y:.2f}‰<br>"
-                            + "<extra></extra>"
-                        ),
-                    )
-                )
+        return {
+            crime: ProjectionSeries(
+                years=crime_data["annee"].to_numpy(),
+                projection=crime_data["projection"].to_numpy(),
+                lower_bound=crime_data["lower_bound"].to_numpy(),
+                upper_bound=crime_data["upper_bound"].to_numpy(),
+                is_projection=(crime_data["data_type"] == "PROJECTION").to_numpy(),
+            )
+            for crime, crime_data in df.groupby("type_crime", sort=False)
+        }
 
-                # Données projetées
-                projected = crime_data[crime_data["data_type"] == "PROJECTION"]
-                fig.add_trace(
-                    go.Scatter(
-                        x=projected["annee"],
-                        y=projected["projection"],
-                        name=f"{crime} (Projection)",
-                        mode="lines+markers",
-                        line=dict(dash="dash"),
-                        hovertemplate=(
-                            "Année: %{x}<br>"
-                            + "Projection: %{y:.2f}‰<br>"
-                            + "<extra></extra>"
-                        ),
+    def build_projection_plots(
+        self, df: pd.DataFrame
+    ) -> Tuple[Optional[go.Figure], Optional[go.Figure]]:
+        """Crée en un seul parcours la courbe de projection et la heatmap"""
+        try:
+            plot_data = self._prepare_projection_data(df)
+            if not plot_data:
+                return None, None
+
+            # Toutes les séries partagent la même grille d'années
+            first_series = next(iter(plot_data.values()))
+            last_historical = first_series.years[~first_series.is_projection].max()
+            future_years = first_series.years[first_series.years > last_historical]
+
+            traces = []
+            variations = []
+            with np.errstate(divide="ignore", invalid="ignore"):
+                for crime, series in plot_data.items():
+                    traces.extend(self._projection_traces(crime, series))
+
+                    # Variation par rapport à la dernière année historique
+                    reference = series.projection[series.years == last_historical]
+                    future = series.years > last_historical
+                    variations.append(
+                        (series.projection[future] - reference) / reference * 100
                     )
-                )
 
-                # Intervalle de confiance
-                fig.add_trace(
-                    go.Scatter(
-                        x=projected["annee"].tolist()
-                        + projected["annee"].tolist()[::-1],
-                        y=projected["upper_bound"].tolist()
-                        + projected["lower_bound"].tolist()[::-1],
-                        fill="toself",
-                        fillcolor="rgba(0,176,246,0.2)",
-                        line=dict(color="rgba(255,255,255,0)"),
-                        name=f"{crime} (Intervalle de confiance)",
-                        showlegend=True,
-                        hovertemplate=(
-                            "Année: %{x}<br>"
-                            + "Intervalle: [%{y:.2f}‰]<br>"
-                            + "<extra></extra>"
-                        ),
-                    )
-                )
+        except Exception as e:
+            logger.error(f"Erreur lors de la préparation des projections: {str(e)}")
+            return None, None
+
+        curve = self._create_projection_curve(traces, future_years)
+        heatmap = self._create_prediction_heatmap(
+            np.vstack(variations), future_years, list(plot_data)
+        )
+        return curve, heatmap
+
+    def _projection_traces(
+        self, crime: str, series: ProjectionSeries
+    ) -> List[go.Scatter]:
+        """Traces historique, projection et intervalle de confiance d'un crime"""
+        historical = ~series.is_projection
+        projected = series.is_projection
+        projected_years = series.years[projected]
+
+        return [
+            # Données historiques
+            go.Scatter(
+                x=series.years[historical],
+                y=series.projection[historical],
+                name=f"{crime} (Historique)",
+                mode="lines+markers",
+                line=dict(width=2),
+                hovertemplate=(
+                    "Année: %{x}<br>"
+                    + "Taux: %{y:.2f}‰<br>"
+                    + "<extra></extra>"
+                ),
+            ),
+            # Données projetées
+            go.Scatter(
+                x=projected_years,
+                y=series.projection[projected],
+                name=f"{crime} (Projection)",
+                mode="lines+markers",
+                line=dict(dash="dash"),
+                hovertemplate=(
+                    "Année: %{x}<br>"
+                    + "Projection: %{y:.2f}‰<br>"
+                    + "<extra></extra>"
+                ),
+            ),
+            # Intervalle de confiance
+            go.Scatter(
+                x=np.concatenate([projected_years, projected_years[::-1]]),
+                y=np.concatenate(
+                    [
+                        series.upper_bound[projected],
+                        series.lower_bound[projected][::-1],
+                    ]
+                ),
+                fill="toself",
+                fillcolor="rgba(0,176,246,0.2)",
+                line=dict(color="rgba(255,255,255,0)"),
+                name=f"{crime} (Intervalle de confiance)",
+                showlegend=True,
+                hovertemplate=(
+                    "Année: %{x}<br>"
+                    + "Intervalle: [%{y:.2f}‰]<br>"
+                    + "<extra></extra>"
+                ),
+            ),
+        ]
+
+    def _create_projection_curve(
+        self, traces: List[go.Scatter], future_years: np.ndarray
+    ) -> Optional[go.Figure]:
+        """Crée une courbe d'évolution avec projections futures"""
+        try:
+            fig = go.Figure(data=traces)
 
             fig.update_layout(
                 title="Évolution et Projection des Taux de Criminalité",
@@ -108,9 +171,8 @@ class PredictiveVisualization:
             )
 
             # Ligne verticale pour séparer historique/projection
-            first_projection_year = df[df["data_type"] == "PROJECTION"]["annee"].min()
             fig.add_vline(
-                x=first_projection_year - 0.5,
+                x=future_years.min() - 0.5,
                 line_dash="dash",
                 line_color="gray",
                 annotation_text="Début Projection",
@@ -125,35 +187,16 @@ class PredictiveVisualization:
             )
             return None
 
-    def create_prediction_heatmap(self, df: pd.DataFrame) -> Optional[go.Figure]:
+    def _create_prediction_heatmap(
+        self, variations: np.ndarray, future_years: np.ndarray, crimes: List[str]
+    ) -> Optional[go.Figure]:
         """Crée une heatmap des variations prédites"""
         try:
-            required_columns = ["type_crime", "annee", "projection", "data_type"]
-            if not self._validate_dataframe(df, required_columns):
-                return None
-
-            # Calcul des variations par rapport à la dernière année historique
-            df_pivot = df.pivot(
-                index="type_crime", columns="annee", values="projection"
-            )
-
-            # Dernière année historique comme référence
-            last_historical = df[df["data_type"] == "HISTORIQUE"]["annee"].max()
-            reference_values = df_pivot[last_historical]
-
-            # Calcul des variations en pourcentage
-            variations = pd.DataFrame()
-            for year in df_pivot.columns[df_pivot.columns > last_historical]:
-                variations[year] = (
-                    (df_pivot[year] - reference_values) / reference_values * 100
-                )
-
-            # Création de la heatmap
             fig = go.Figure(
                 data=go.Heatmap(
-                    z=variations.values,
-                    x=variations.columns,
-                    y=variations.index,
+                    z=variations,
+                    x=future_years,
+                    y=crimes,
                     colorscale=self.color_scale,
                     zmid=0,  # Centre la couleur sur 0
                     colorbar=dict(title="Variation (%)", titleside="right"),
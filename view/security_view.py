@@ -315,7 +315,7 @@ class SecurityVisualization:
 
             # Préparation des données
             risk_data = (
-                df.groupby(["type_crime", "niveau_risque"])["taux_dept"]
+                df.groupby(["type_crime", "niveau_risque"], observed=True)["taux_dept"]
                 .mean()
                 .reset_index()
             )
@@ -413,6 +413,7 @@ class SecurityVisualization:
                 columns="niveau_alerte",
                 aggfunc="count",
                 fill_value=0,
+                observed=True,
             )
 
             # Création de la heatmap
@@ -449,6 +450,89 @@ class SecurityVisualization:
             logger.error(f"Erreur lors de la création de la heatmap: {str(e)}")
             return None
 
+    def create_insufficient_history_notice(self) -> go.Figure:
+        """Crée le message affiché quand l'historique est trop court (2016)"""
+        fig = go.Figure()
+
+        # Ajout d'un rectangle de fond pour mieux voir le message
+        fig.add_shape(
+            type="rect",
+            x0=0,
+            y0=0,
+            x1=1,
+            y1=1,
+            xref="paper",
+            yref="paper",
+            fillcolor="white",
+            line_width=0,
+        )
+
+        # Icône d'information
+        fig.add_annotation(
+            text="ℹ️",
+            xref="paper",
+            yref="paper",
+            x=0.5,
+            y=1.25,
+            showarrow=False,
+            font=dict(size=40),
+            align="center",
+        )
+
+        # Titre
+        fig.add_annotation(
+            text="Données historiques insuffisantes",
+            xref="paper",
+            yref="paper",
+            x=0.5,
+            y=1,
+            showarrow=False,
+            font=dict(size=24, color="darkblue", family="Arial Black"),
+            align="center",
+        )
+
+        # Message explicatif
+        fig.add_annotation(
+            text=(
+                "2016 est la première année de nos données.<br>"
+                + "Le calcul du niveau d'alerte nécessite un historique<br>"
+                + "d'au moins 2 ans pour être pertinent.<br><br>"
+                + "👉 Consultez les années ultérieures pour<br>"
+                + "voir l'évolution des alertes."
+            ),
+            xref="paper",
+            yref="paper",
+            x=0.5,
+            y=0.4,
+            showarrow=False,
+            font=dict(size=16, color="gray"),
+            align="center",
+        )
+
+        fig.update_layout(
+            showlegend=False,
+            height=300,
+            paper_bgcolor="white",
+            plot_bgcolor="white",
+            margin=dict(t=50, b=50, l=50, r=50),
+            # Message figé : ni zoom, ni survol à gérer côté navigateur
+            dragmode=False,
+            hovermode=False,
+            xaxis={
+                "showgrid": False,
+                "showticklabels": False,
+                "zeroline": False,
+                "fixedrange": True,
+            },
+            yaxis={
+                "showgrid": False,
+                "showticklabels": False,
+                "zeroline": False,
+                "fixedrange": True,
+            },
+        )
+        return fig
+
     def create_alert_gauge(self, df: pd.DataFrame) -> Optional[go.Figure]:
         """Crée une jauge de niveau d'alerte basée sur les z-scores"""
         try:
@@ -33,12 +33,11 @@ class TerritorialVisualization:
             if not self._validate_dataframe(df, required_columns):
                 return None
 
-            # Pivot des données pour la heatmap
-            pivot_data = df.pivot_table(
-                values="taux_pour_mille",
+            # Une ligne par (département, crime) en sortie SQL : simple remise en forme
+            pivot_data = df.pivot(
                 index="code_departement",
                 columns="type_crime",
-                aggfunc="mean",
+                values="taux_pour_mille",
             )
 
             # Création de la heatmap
@@ -390,13 +389,11 @@ class TerritorialVisualization:
             fig = go.Figure()
 
             # Une ligne pour chaque type de crime
-            for crime_type in df["type_crime"].unique():
-                crime_data = df[df["type_crime"] == crime_type]
-
+            for crime_type, crime_data in df.groupby("type_crime", sort=False):
                 fig.add_trace(
                     go.Scatter(
-                        x=crime_data["annee"],
-                        y=crime_data["taux_moyen"],
+                        x=crime_data["annee"].to_numpy(),
+                        y=crime_data["taux_moyen"].to_numpy(),
                         name=crime_type,
                         mode="lines+markers",
                         hovertemplate=(
@@ -431,9 +428,9 @@ class TerritorialVisualization:
             if not self._validate_dataframe(df, required_columns):
                 return None
 
-            # Pivot des données pour la heatmap
-            pivot_data = df.pivot_table(
-                values="taux_moyen", index="type_crime", columns="annee", aggfunc="mean"
+            # Agrégation déjà faite par le GROUP BY SQL : simple remise en forme
+            pivot_data = df.pivot(
+                index="type_crime", columns="annee", values="taux_moyen"
             )
 
             fig = go.Figure(